@@ -0,0 +1,917 @@
+"""
+Local benchmarks for the scraper.
+
+Starts a stub copy of gundam-gcg.com on localhost (list view, detail pages and
+parallel art images, with configurable latency), points main.py at it and
+times the crawl. Nothing here touches the live site.
+
+    python bench.py enrich --cards 60 --latency 0.05 --workers 8
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+from bs4 import BeautifulSoup
+
+import card_lookup
+import card_query
+import card_stream
+import checkpoint
+import deck_stats
+import export_db
+import fetch
+import http_cache
+import image_sync
+import main
+import metrics
+import normalize
+import og_main
+import reconcile
+import replay
+import search_index
+
+# --- STUB SITE ---
+
+STUB_SET = {"id": "GD01", "name": "Legend of the MS", "type": "seq", "internal_id": "616101"}
+
+def make_stub_cards(set_id, count):
+    """Synthetic cards shaped like the real detail pages (every third card has parallels)."""
+    colors = ["Blue", "Red", "Green", "White", "Purple"]
+    types = ["UNIT", "PILOT", "COMMAND", "BASE"]
+    cards = {}
+    for i in range(1, count + 1):
+        card_no = f"{set_id}-{i:03d}"
+        rarities = ["R", "R+", "R++"] if i % 3 == 0 else ["C"]
+        cards[card_no] = {
+            "name": f"Stub Card {i}",
+            "rarity": "・".join(rarities),
+            "parallels": len(rarities) - 1,
+            "text": f"<Repair {i % 3 + 1}> (At the end of your turn, this Unit recovers HP.)\n【During Pair】All your Units get AP+{i % 2 + 1}.",
+            "stats": [
+                ("Lv.", str(i % 7 + 1)), ("COST", str(i % 5 + 1)), ("COLOR", colors[i % len(colors)]),
+                ("TYPE", types[i % len(types)]), ("ZONE", "Space Earth"), ("TRAIT", "(Earth Federation)"),
+                ("LINK", f"[Pilot {i}]"), ("AP", str(i % 6)), ("HP", str(i % 5 + 1)),
+                ("Source Title", "Mobile Suit Gundam"), ("Where to get it", f"{STUB_SET['name']} [{set_id}]"),
+            ],
+            "faq": [(f"Does card {i} work with <Blocker>?", "Yes, it does.")] if i % 4 == 0 else [],
+        }
+    return cards
+
+def render_list(cards):
+    rows = "".join(
+        f'<li><span class="number">{no}</span><span class="cardName">{c["name"]}</span></li>'
+        for no, c in cards.items()
+    )
+    return f'<html><body><div class="cardList"><ul class="list">{rows}</ul></div></body></html>'
+
+# Site chrome around the card block, roughly the size of the real page's
+# header navigation, scripts and footer
+PAGE_CHROME_HEAD = (
+    '<html><head><title>Card</title>'
+    + "".join(f'<script>var cfg{i} = {{"k": {i}, "v": "{"x" * 40}"}};</script>' for i in range(40))
+    + '</head><body><header><nav><ul>'
+    + "".join(f'<li class="navItem"><a href="/en/page{i}.html">Menu entry {i}</a></li>' for i in range(300))
+    + '</ul></nav></header>'
+)
+PAGE_CHROME_FOOT = (
+    '<footer><ul>'
+    + "".join(f'<li><a href="/en/link{i}.html">Footer link {i}</a></li>' for i in range(150))
+    + '</ul><p>Stub</p></footer></body></html>'
+)
+
+def render_detail(card):
+    stats = "".join(f"<dt>{k}</dt><dd>{v}</dd>" for k, v in card["stats"])
+    faq = "".join(f"<dt>{q}</dt><dd>{a}</dd>" for q, a in card["faq"])
+    text = card["text"].replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br>")
+    return (
+        PAGE_CHROME_HEAD
+        + f'<div class="cardDetail"><h1 class="cardName">{card["name"]}</h1>'
+        f'<div class="rarity">{card["rarity"]}</div>'
+        f'<div class="cardDataRow overview"><div class="dataTxt">{text}</div></div>'
+        f'<div class="cardDataRow"><dl>{stats}</dl></div>'
+        f'<div class="qaArea"><dl>{faq}</dl></div></div>'
+        + PAGE_CHROME_FOOT
+    )
+
+class StubSite:
+    """Serves the list view, detail pages and image HEADs for a set of stub cards."""
+
+    def __init__(self, cards, latency=0.0, set_meta=STUB_SET, port=0):
+        self.cards = cards
+        self.latency = latency
+        self.set_meta = set_meta
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=b"", content_type="text/html; charset=utf-8"):
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if status in (200, 304):
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                with site.lock:
+                    site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                url = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path.endswith("/cards/index.php"):
+                    if query.get("product") == site.set_meta["internal_id"]:
+                        listed = {no: c for no, c in site.cards.items() if no.startswith(site.set_meta["id"] + "-")}
+                        return self._reply(200, render_list(listed).encode())
+                    return self._reply(200, b'<html><body><div class="cardList"></div></body></html>')
+                if url.path.endswith("/cards/detail.php"):
+                    card = site.cards.get(query.get("detailSearch", ""))
+                    if card:
+                        return self._reply(200, render_detail(card).encode())
+                    return self._reply(200, b"<html><body><p>No card found.</p></body></html>")
+                if url.path.startswith("/en/images/cards/card/"):
+                    name = url.path.rsplit("/", 1)[-1][:-len(".webp")]
+                    base, _, p = name.partition("_p")
+                    card = site.cards.get(base)
+                    if card and (not p or (p.isdigit() and int(p) <= card["parallels"])):
+                        return self._reply(200, b"RIFF....WEBP", "image/webp")
+                    return self._reply(404)
+                return self._reply(404)
+
+            do_HEAD = do_GET
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+class StubImageCDN:
+    """
+    Stand-in for the exburst host (GET /img/<id>.webp with ETags, GET /feed.json
+    for the card API) and the upload endpoint (POST /upload/<id>).
+    """
+
+    def __init__(self, images, latency=0.0, upload_latency=0.0, feed=b"[]"):
+        self.images = images
+        self.feed = feed
+        self.latency = latency
+        self.upload_latency = upload_latency
+        self.uploads = 0
+        self.downloads = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler(self):
+        cdn = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=b"", headers=()):
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in headers:
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                time.sleep(cdn.latency)
+                if self.path == "/feed.json":
+                    return self._reply(200, cdn.feed, [("Content-Type", "application/json")])
+                card_id = self.path.rsplit("/", 1)[-1][:-len(".webp")]
+                data = cdn.images.get(card_id)
+                if data is None:
+                    return self._reply(404)
+                etag = f'"{hashlib.sha1(data).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self._reply(304, headers=[("ETag", etag)])
+                with cdn.lock:
+                    cdn.downloads += 1
+                self._reply(200, data, [("ETag", etag), ("Content-Type", "image/webp")])
+
+            def do_POST(self):
+                time.sleep(cdn.upload_latency)
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with cdn.lock:
+                    cdn.uploads += 1
+                card_id = self.path.rsplit("/", 1)[-1]
+                body = json.dumps({"secure_url": f"https://cdn.invalid/gundam_cards/{card_id}.webp"}).encode()
+                self._reply(200, body, [("Content-Type", "application/json")])
+
+        return Handler
+
+    def uploader(self):
+        session = requests.Session()
+        return lambda data, card_id: session.post(f"{self.base}/upload/{card_id}", data=data, timeout=30).json()['secure_url']
+
+    __enter__ = StubSite.__enter__
+    __exit__ = StubSite.__exit__
+
+def point_main_at(base):
+    """Redirects main.py's site URLs to a stub server."""
+    main.BASE_URL = f"{base}/en/cards/index.php"
+    main.DETAIL_URL = f"{base}/en/cards/detail.php"
+    main.IMAGE_BASE = f"{base}/en/images/cards/card/"
+    main.HOST = base
+
+def process_set(set_meta):
+    """A set's list view, enriched (the per-set core of main.crawl_set, without the delta)."""
+    return main.enrich_cards(main.list_set_cards(set_meta), set_meta['id'])
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+# --- BENCHMARKS ---
+
+def bench_enrich(args):
+    """Serial vs pooled process_set over the stub site; outputs must match exactly."""
+    cards = make_stub_cards(STUB_SET["id"], args.cards)
+    fetch.RATE_LIMITER = fetch.HostRateLimiter(args.rate)
+    http_cache.CACHE_FILE = ""
+    with StubSite(cards, latency=args.latency) as site:
+        point_main_at(site.base)
+        results = {}
+        for workers in (1, args.workers):
+            main.MAX_WORKERS = workers
+            out, elapsed = timed(process_set, dict(STUB_SET))
+            results[workers] = (json.dumps(out, indent=2), elapsed)
+            print(f"workers={workers:<3} {len(out)} records in {elapsed:.2f}s")
+
+    serial, pooled = results[1], results[args.workers]
+    print(f"speedup: {serial[1] / pooled[1]:.1f}x, identical output: {serial[0] == pooled[0]}")
+
+def bench_cache(args):
+    """Cold vs revalidated crawl of the stub site through a fresh HTTP cache."""
+    cards = make_stub_cards(STUB_SET["id"], args.cards)
+    fetch.RATE_LIMITER = fetch.HostRateLimiter(args.rate)
+    main.MAX_WORKERS = args.workers
+    with tempfile.TemporaryDirectory() as tmp, StubSite(cards, latency=args.latency) as site:
+        point_main_at(site.base)
+        http_cache.CACHE_FILE = os.path.join(tmp, "cache.sqlite")
+        runs = []
+        for label in ("cold", "warm"):
+            before = site.requests
+            out, elapsed = timed(process_set, dict(STUB_SET))
+            runs.append(json.dumps(out, indent=2))
+            print(f"{label:<5} {len(out)} records in {elapsed:.2f}s ({site.requests - before} requests)")
+        http_cache.get_cache().close()
+        http_cache._cache = None
+    print(f"identical output: {runs[0] == runs[1]}")
+
+def bench_parse(args):
+    """Per-page parse_details cost by parser backend, with and without the card-data strainer."""
+    if args.fixtures:
+        pages = [open(p, "rb").read() for p in sorted(glob.glob(os.path.join(args.fixtures, "*.html")))]
+    else:
+        pages = [render_detail(c).encode() for c in make_stub_cards(STUB_SET["id"], args.cards).values()]
+
+    backends = ["html.parser"] + (["lxml"] if main.default_html_parser() == "lxml" else [])
+    baseline = None
+    for backend in backends:
+        for strainer in (None, main.DETAIL_STRAINER):
+            out, elapsed = timed(lambda: [main.parse_details(BeautifulSoup(p, backend, parse_only=strainer)) for p in pages])
+            baseline = baseline or (out, elapsed)
+            label = f"{backend}{' + strainer' if strainer else ''}"
+            print(f"{label:<24} {elapsed / len(pages) * 1000:6.2f} ms/page "
+                  f"({baseline[1] / elapsed:.1f}x, identical: {out == baseline[0]})")
+
+def synthetic_records(count):
+    """Card records in the cards.json shape, cycled from the checked-in database."""
+    with open(main.CARDS_FILE, 'r', encoding='utf-8') as f:
+        seed = json.load(f)
+    for i in range(count):
+        cycle = i // len(seed)
+        card = dict(seed[i % len(seed)])
+        card['id'] = f"{card['id']}#{cycle}"
+        card['card_no'] = f"{card['card_no']}#{cycle}"
+        yield card
+
+def measure(fn):
+    """Runs fn twice: timed, then under tracemalloc. Returns (result, seconds, peak MB)."""
+    result, elapsed = timed(fn)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+def bench_write(args):
+    """Holding every card and json.dump-ing at the end vs streaming through CardWriter."""
+    with tempfile.TemporaryDirectory() as tmp:
+        def dump_at_end():
+            cards_out = {c['id']: c for c in synthetic_records(args.records)}
+            with open(os.path.join(tmp, "dump.json"), 'w', encoding='utf-8') as f:
+                json.dump(list(cards_out.values()), f, indent=2)
+
+        def stream(fmt):
+            with card_stream.CardWriter(os.path.join(tmp, f"stream.{fmt}"), fmt) as writer:
+                writer.write_all(synthetic_records(args.records))
+
+        for label, fn in [("json.dump", dump_at_end), ("stream json", lambda: stream("json")),
+                          ("stream ndjson", lambda: stream("ndjson"))]:
+            _, elapsed, peak = measure(fn)
+            print(f"{label:<14} {elapsed:6.2f}s  peak {peak:7.1f} MB")
+
+        with open(os.path.join(tmp, "dump.json"), 'rb') as a, open(os.path.join(tmp, "stream.json"), 'rb') as b:
+            print(f"identical cards.json: {a.read() == b.read()}")
+
+        _, elapsed, peak = measure(lambda: sum(1 for _ in card_stream.iter_cards(os.path.join(tmp, "stream.ndjson"))))
+        print(f"{'iter_cards':<14} {elapsed:6.2f}s  peak {peak:7.1f} MB")
+
+QUERIES = [
+    ("Blue units, cost <= 3, Earth Federation",
+     dict(color="Blue", type="UNIT", cost_max=3, trait="Earth Federation"),
+     lambda c: c['color'] == "Blue" and c['type'] == "UNIT" and c['cost'] is not None and c['cost'] <= 3
+     and "(Earth Federation)" in (c['trait'] or "")),
+    ("GD02 commands", dict(set="GD02", type="COMMAND"), lambda c: c['set'] == "GD02" and c['type'] == "COMMAND"),
+    ("level 5+ linked to Amuro Ray", dict(level_min=5, link="Amuro Ray"),
+     lambda c: c['level'] is not None and c['level'] >= 5 and "[Amuro Ray]" in (c['link'] or "")),
+    ("LR rarity", dict(rarity="LR"), lambda c: c['rarity'] == "LR"),
+]
+
+def bench_query(args):
+    """Indexed CardDB queries vs list-comprehension scans over a scaled card pool."""
+    cards = list(synthetic_records(args.records))
+    db, build = timed(card_query.CardDB, cards)
+    print(f"index build: {build * 1000:.1f} ms for {len(cards)} cards")
+    for label, criteria, predicate in QUERIES:
+        naive, t_naive = timed(lambda: [[c for c in cards if predicate(c)] for _ in range(args.repeat)])
+        indexed, t_index = timed(lambda: [db.query(**criteria) for _ in range(args.repeat)])
+        print(f"{label:<42} {len(naive[0]):>5} hits  scan {t_naive / args.repeat * 1000:7.3f} ms  "
+              f"index {t_index / args.repeat * 1000:7.3f} ms  ({t_naive / t_index:5.1f}x, same: {naive[0] == indexed[0]})")
+
+SEARCHES = ["<Repair", "<Repair 2>", "【During Pair】", "Blocker", '"during your turn"', "ap+1"]
+
+def bench_search(args):
+    """Inverted-index keyword search vs substring scans over effect_text and FAQ."""
+    cards = list(synthetic_records(args.records))
+    index, build = timed(search_index.SearchIndex.build, cards)
+    print(f"index build: {build * 1000:.1f} ms for {len(index.docs)} documents, {len(index.terms)} terms")
+
+    def scan(needle):
+        needle = needle.strip('"').lower()
+        hits = []
+        for c in cards:
+            texts = [c['effect_text'] or ""] + [f"{e['question']}\n{e['answer']}" for e in c['faq']]
+            if any(needle in t.lower() for t in texts):
+                hits.append(c['card_no'])
+        return list(dict.fromkeys(hits))
+
+    for q in SEARCHES:
+        naive, t_scan = timed(scan, q)
+        hits, t_index = timed(lambda: [index.search(q) for _ in range(args.repeat)])
+        print(f"{q:<22} {len(hits[0]):>5} hits (scan {len(naive):>5})  scan {t_scan * 1000:8.2f} ms  "
+              f"index {t_index / args.repeat * 1000:6.3f} ms")
+
+def serial_temp_file_sync(session, upload, jobs):
+    """The previous og_main behaviour: download to a temp file, then always upload."""
+    for card_id, url in jobs:
+        temp_filename = f"temp_{card_id}.jpg"
+        with session.get(url, stream=True) as r:
+            r.raise_for_status()
+            with open(temp_filename, 'wb') as f:
+                for chunk in r.iter_content(8192):
+                    f.write(chunk)
+        with open(temp_filename, 'rb') as f:
+            upload(f.read(), card_id)
+        os.remove(temp_filename)
+
+def bench_images(args):
+    """Temp-file serial uploads vs ImageSync (in-memory, hash-skipping, concurrent) against local stand-ins."""
+    images = {f"GD01-{i:03d}": os.urandom(40_000) for i in range(1, args.cards + 1)}
+    jobs = lambda base: [(card_id, f"{base}/img/{card_id}.webp") for card_id in images]
+    with tempfile.TemporaryDirectory() as tmp, StubImageCDN(images, args.latency, args.latency) as cdn:
+        session = requests.Session()
+        upload = cdn.uploader()
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            _, elapsed = timed(serial_temp_file_sync, session, upload, jobs(cdn.base))
+        finally:
+            os.chdir(cwd)
+        print(f"serial temp-file     {elapsed:6.2f}s  {cdn.uploads} uploads")
+
+        sync = image_sync.ImageSync(session, upload, os.path.join(tmp, "manifest.json"), workers=args.workers)
+        for label in ("ImageSync cold", "ImageSync warm"):
+            before = cdn.uploads, cdn.downloads
+            _, elapsed = timed(sync.sync, jobs(cdn.base))
+            print(f"{label:<20} {elapsed:6.2f}s  {cdn.uploads - before[0]} uploads, {cdn.downloads - before[1]} downloads")
+
+        for card_id in list(images)[::10]:
+            images[card_id] = os.urandom(40_000)
+        before = cdn.uploads
+        _, elapsed = timed(sync.sync, jobs(cdn.base))
+        print(f"{'10% changed':<20} {elapsed:6.2f}s  {cdn.uploads - before} uploads")
+
+VARIANT_SUFFIXES = ["-ALT1", "_PAR", "-P", "-AP", "-ALT2"]
+
+def synthetic_feed(count):
+    """
+    exburst-style API records; every 4th base card has variants, some listed
+    before it. Stops at a card boundary, so there may be a few more than count.
+    """
+    feed = []
+    i = 0
+    while len(feed) < count:
+        base = {"cardNo": f"GD{i // 1000 % 100:02d}-{i % 1000:03d}", "name": f"Unit {i}", "cost": i % 7,
+                "rarity": "C", "image": f"https://img.example/{i}.webp", "series": f"GD{i // 1000 % 100:02d}",
+                "effectData": "<Blocker> 【Deploy】Choose 1 enemy Unit with 3 or less HP. Rest it. (ダメージ)",
+                "categoryData": "UNIT", "apData": str(i % 6)}
+        variants = [{**base, "cardNo": base['cardNo'] + suffix, "rarity": "P", "name": f"Unit {i} (alt)",
+                     "image": f"https://img.example/{i}{suffix}.webp"}
+                    for suffix in (VARIANT_SUFFIXES[:i % 3 + 1] if i % 4 == 0 else [])]
+        feed.extend(variants + [base] if i % 8 == 0 else [base] + variants)
+        i += 1
+    return feed
+
+def legacy_merge(api_data):
+    """The previous run_update merge loop (regex search + sub per id, placeholders never promoted), minus uploads."""
+    import re
+    master_cards = {}
+    for card in api_data:
+        raw_id = card.get('cardNo')
+        if not raw_id: continue
+        is_variant = False
+        base_id = raw_id
+        if re.search(r'(-ALT\d*|_PAR|-P|-AP)$', raw_id, re.IGNORECASE):
+            base_id = re.sub(r'(-ALT\d*|_PAR|-P|-AP)$', '', raw_id, flags=re.IGNORECASE)
+            is_variant = True
+        if base_id not in master_cards:
+            card_copy = card.copy()
+            card_copy['cardNo'] = base_id
+            card_copy['variants'] = []
+            master_cards[base_id] = card_copy
+        if is_variant:
+            master_cards[base_id]['variants'].append({"variantId": raw_id, "image": card.get('image'), "rarity": card.get('rarity')})
+    return master_cards
+
+def bench_merge(args):
+    """Old variant merge loop vs og_main.merge_variants on a synthetic API feed."""
+    feed = synthetic_feed(args.records)
+    fresh = [[dict(c) for c in feed] for _ in range(args.repeat)]  # merge_variants takes over its records
+    old, t_old = timed(lambda: [legacy_merge(feed) for _ in range(args.repeat)])
+    new, t_new = timed(lambda: [og_main.merge_variants(records) for records in fresh])
+    old, new = old[0], new[0]
+    bases = {c['cardNo']: c for c in feed if not og_main.split_card_no(c['cardNo'])[1]}
+    stale = sum(1 for card_id, m in old.items() if m['name'] != bases[card_id]['name'])
+    promoted = sum(1 for card_id, m in new.items() if m['name'] == bases[card_id]['name'] and not m.get('is_placeholder'))
+    print(f"{len(feed)} records -> {len(new)} base cards, {sum(len(m['variants']) for m in new.values())} variants")
+    print(f"legacy loop      {t_old / args.repeat * 1000:7.1f} ms  ({stale} masters left with variant stats)")
+    print(f"merge_variants   {t_new / args.repeat * 1000:7.1f} ms  ({t_old / t_new:.1f}x, {promoted}/{len(new)} masters hold base stats, "
+          f"same order + variants: {[(k, m['variants']) for k, m in old.items()] == [(k, m['variants']) for k, m in new.items()]})")
+
+def bench_feed(args):
+    """Peak memory of response.json() + merge vs og_main.iter_feed streamed into merge_variants, over a local feed."""
+    feed = json.dumps(synthetic_feed(args.records), ensure_ascii=False).encode()
+    with StubImageCDN({}, feed=feed) as host:
+        url = f"{host.base}/feed.json"
+        session = requests.Session()
+        print(f"feed: {args.records} records, {len(feed) / 1e6:.1f} MB")
+
+        def buffered(merge):
+            response = session.get(url)
+            response.raise_for_status()
+            return merge(response.json())
+
+        rows = [("json() + legacy loop", lambda: buffered(legacy_merge)),
+                ("json() + merge_variants", lambda: buffered(og_main.merge_variants)),
+                ("iter_feed streamed", lambda: og_main.merge_variants(og_main.iter_feed(session, url)))]
+        results = []
+        for label, fn in rows:
+            masters, elapsed, peak = measure(fn)
+            results.append(masters)
+            print(f"{label:<24} {elapsed:6.2f}s  peak {peak:7.1f} MB  {len(masters)} base cards")
+        print(f"streamed == buffered merge: {results[1] == results[2]}")
+
+def stub_archive(args, path):
+    """Records a crawl of the stub site (GD01 list view + a brute-forced starter) into path."""
+    cards = make_stub_cards(STUB_SET["id"], args.cards)
+    cards.update(make_stub_cards("ST01", min(args.cards, 25)))
+    sets = [{"id": "ST01", "name": "Heroic Beginnings", "type": "seq", "internal_id": ""}, dict(STUB_SET)]
+    with StubSite(cards, set_meta=STUB_SET) as site, replay.scratch_dir({main.CONFIG_FILE: json.dumps(sets).encode()}):
+        point_main_at(site.base)
+        return replay.record(path)
+
+def bench_replay(args):
+    """Full main(), per-set process_set and detail parsing against a recorded archive; outputs must match it."""
+    fetch.RATE_LIMITER = fetch.HostRateLimiter(args.rate)
+    main.MAX_WORKERS = args.workers
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = replay.Archive.load(args.archive) if args.archive else stub_archive(args, os.path.join(tmp, "stub.zip"))
+    print(f"archive: {len(archive.exchanges)} exchanges, replay latency {args.latency * 1000:.0f} ms")
+
+    (outputs, adapter), elapsed = timed(replay.run_main, archive, args.latency)
+    same = all(outputs.get(name) == archive.files.get(name) for name in replay.OUTPUTS)
+    print(f"main()          {elapsed:6.2f}s  identical outputs: {same}, unrecorded requests: {len(adapter.misses)}")
+
+    recorded = {}
+    for card in json.loads(archive.files[main.CARDS_FILE]):
+        recorded.setdefault(card['set'], {}).setdefault(card['id'], card)
+    seed = {k[len("input/"):]: v for k, v in archive.files.items() if k.startswith("input/")}
+    with replay.scratch_dir(seed), replay.replaying(archive, args.latency):
+        for s in main.hunt_for_new_sets(main.load_known_sets()):
+            if s['id'] not in recorded: continue
+            out, elapsed = timed(process_set, s)
+            records = {}
+            for c in out:
+                records.setdefault(c.get('id', c['card_no']), main.build_card_record(c, s['id']))
+            print(f"process_set {s['id']:<5} {elapsed:6.2f}s  {len(records)} records, "
+                  f"identical: {list(records.values()) == list(recorded[s['id']].values())}")
+
+    pages = list(archive.detail_pages().items())
+    parse = lambda: [main.parse_details(main.make_soup(page, main.DETAIL_STRAINER)) for _, page in pages]
+    _, elapsed = timed(parse)
+    print(f"parse_details   {elapsed / max(1, len(pages)) * 1000:6.2f} ms/page over {len(pages)} recorded pages")
+
+class NullJournal(checkpoint.Journal):
+    """Writes nothing: a crawl without checkpointing, for comparison."""
+
+    def append(self, entry):
+        pass
+
+class SizedJournal(checkpoint.Journal):
+    """Remembers how large the journal grew (a clean run deletes it on close)."""
+    size = 0
+
+    def close(self, finished=False):
+        SizedJournal.size = os.path.getsize(self.path)
+        super().close(finished)
+
+def bench_resume(args):
+    """
+    Peak memory and journal size of a clean crawl with and without the
+    journal; then a crawl that fails on its last set, then --resume, for every
+    mix of serial and --workers runs; resumed outputs must match a clean crawl.
+    The failure is injected before the pool starts, so workers inherit it
+    (fork start method).
+    """
+    fetch.RATE_LIMITER = fetch.HostRateLimiter(args.rate)
+    http_cache.CACHE_FILE = ""
+    journal = checkpoint.Journal
+    with StubSite(make_stub_cards(STUB_SET["id"], args.cards), latency=args.latency) as site:
+        point_main_at(site.base)
+        for label, journal_class in [("journal", SizedJournal), ("no journal", NullJournal)]:
+            with replay.scratch_dir({main.CONFIG_FILE: json.dumps([STUB_SET]).encode()}):
+                checkpoint.Journal = journal_class
+                try:
+                    _, elapsed, peak = measure(lambda: main.main(report_file=""))
+                finally:
+                    checkpoint.Journal = journal
+                size = os.path.getsize(main.CARDS_FILE)
+            written = f", journal {SizedJournal.size / 1e3:.0f} KB" if journal_class is SizedJournal else ""
+            print(f"{args.cards} cards, {label:<10} {elapsed:6.2f}s  peak {peak:5.1f} MB  cards.json {size / 1e3:.0f} KB{written}")
+
+    set_ids = ["ST01", "ST02", "ST03"]
+    cards = {}
+    for set_id in set_ids:
+        cards.update(make_stub_cards(set_id, min(args.cards, 20)))
+    sets = [{"id": set_id, "name": set_id, "type": "seq", "internal_id": ""} for set_id in set_ids]
+    config = {main.CONFIG_FILE: json.dumps(sets).encode()}
+    enrich = main.enrich_cards
+
+    def failing(cards, set_id):
+        if set_id == set_ids[-1]: raise RuntimeError("injected failure")
+        return enrich(cards, set_id)
+
+    with StubSite(cards, latency=args.latency) as site:
+        point_main_at(site.base)
+        with replay.scratch_dir(config):
+            before = site.requests
+            main.main(report_file="")
+            clean, full = replay.read_files(replay.OUTPUTS), site.requests - before
+        print(f"clean crawl: {full} requests")
+        for failed_workers, resume_workers in [(1, 1), (1, args.processes), (args.processes, 1)]:
+            with replay.scratch_dir(config):
+                main.enrich_cards = failing
+                try:
+                    main.main(report_file="", workers=failed_workers)
+                except Exception:
+                    pass
+                finally:
+                    main.enrich_cards = enrich
+                before = site.requests
+                main.main(report_file="", workers=resume_workers, resume=True)
+                same = replay.read_files(replay.OUTPUTS) == clean
+            print(f"failed with workers={failed_workers}, resumed with workers={resume_workers}: "
+                  f"{site.requests - before} requests, identical outputs: {same}")
+
+def bench_shards(args):
+    """Serial main() vs --workers N process pool over several brute-forced sets; outputs must match."""
+    fetch.RATE_LIMITER = fetch.HostRateLimiter(args.rate)
+    http_cache.CACHE_FILE = ""
+    set_ids = ["ST01", "ST02", "ST03", "ST04", "ST05", "ST06"]
+    cards = {}
+    for set_id in set_ids:
+        cards.update(make_stub_cards(set_id, min(args.cards, 25)))
+    sets = [{"id": set_id, "name": set_id, "type": "seq", "internal_id": ""} for set_id in set_ids]
+    outputs = {}
+    with StubSite(cards, latency=args.latency) as site:
+        point_main_at(site.base)
+        for workers in (1, args.processes):
+            with replay.scratch_dir({main.CONFIG_FILE: json.dumps(sets).encode()}):
+                _, elapsed = timed(main.main, False, "json", False, False, "", workers)
+                outputs[workers] = replay.read_files(replay.OUTPUTS)
+            print(f"processes={workers:<3} {elapsed:6.2f}s")
+    print(f"identical outputs: {outputs[1] == outputs[args.processes]}")
+
+def feed_from_cards(cards_json, skip_every=4, differ_every=10):
+    """og_main-shaped feed of cards.json's base cards; every skip_every-th is left out, every differ_every-th has other text."""
+    records = json.loads(cards_json)
+    parallels = {}
+    for r in records:
+        if r['id'] != r['card_no']:
+            parallels.setdefault(r['card_no'], []).append(r)
+    feed = []
+    for i, r in enumerate(r for r in records if r['id'] == r['card_no']):
+        if i % skip_every == skip_every - 1: continue
+        text = (r['effect_text'] or "").replace("\n", "<br>") + "<br>"
+        feed.append({
+            "cardNo": r['card_no'], "name": r['name'], "cost": r['cost'], "color": r['color'], "rarity": r['rarity'],
+            "apData": str(r['ap']) if r['ap'] is not None else 0, "categoryData": r['type'],
+            "variants": [{"variantId": f"{r['card_no']}-ALT{n}", "image": p['image_url'], "rarity": p['rarity']}
+                         for n, p in enumerate(parallels.get(r['card_no'], []), 1)],
+            "effectData": "Errata: " + text if i % differ_every == 0 else text,
+        })
+    return json.dumps(feed).encode()
+
+def bench_reconcile(args):
+    """Re-crawl of the stub site without and with --feed (og_main's feed vouching for most cards); outputs must match."""
+    fetch.RATE_LIMITER = fetch.HostRateLimiter(args.rate)
+    main.MAX_WORKERS = args.workers
+    cards = make_stub_cards(STUB_SET["id"], args.cards)
+    cards.update(make_stub_cards("ST01", min(args.cards, 25)))
+    sets = [{"id": "ST01", "name": "Heroic Beginnings", "type": "seq", "internal_id": ""}, dict(STUB_SET)]
+    config = {main.CONFIG_FILE: json.dumps(sets).encode()}
+    with StubSite(cards, latency=args.latency, set_meta=STUB_SET) as site:
+        point_main_at(site.base)
+        with replay.scratch_dir(config):
+            main.main(report_file="")
+            previous = replay.read_files([main.CARDS_FILE])
+        feed = feed_from_cards(previous[main.CARDS_FILE])
+
+        outputs = {}
+        for label, kwargs in [("plain re-crawl", {}), ("--feed", {"feed": "feed.json"})]:
+            with replay.scratch_dir({**config, **previous, "feed.json": feed}):
+                before = site.requests
+                _, elapsed = timed(lambda: main.main(report_file="", **kwargs))
+                outputs[label] = replay.read_files(replay.OUTPUTS)
+                report = json.loads(replay.read_files([reconcile.REPORT_FILE]).get(reconcile.REPORT_FILE, b"{}"))
+            details = len(metrics.METRICS.stages.get("detail", []))
+            print(f"{label:<15} {elapsed:6.2f}s  {site.requests - before:4d} requests, {details:3d} detail pages")
+        print(f"feed: {report['matched']} of {report['scrape_cards']} cards, {report['agreeing']} agree, "
+              f"{len(report['detail_fetches'])} need their detail page")
+        print(f"identical outputs: {outputs['plain re-crawl'] == outputs['--feed']}")
+
+def synthetic_details(count):
+    """Raw parse_details() dicts with the value mix of real pages (placeholders, 'Lv.3', padding)."""
+    colors = ["Blue", "Red", "Green", "White", "Purple", "-"]
+    traits = ["(Earth Federation)", "(Zeon) (Academy)", "(Titans)", "-"]
+    out = []
+    for i in range(count):
+        d = {"cost": str(i % 8), "hp": "-" if i % 5 == 0 else str(i % 7), "ap": str(i % 6), "level": f"Lv.{i % 9}",
+             "color": colors[i % len(colors)], "trait": traits[i % len(traits)], "link": f"[Pilot {i % 300}]",
+             "zone": " Space Earth ", "source": "Mobile Suit Gundam", "product_name": "N/A" if i % 11 == 0 else "Legend of the MS [GD01]",
+             "text": f"<Repair {i % 3}> Effect number {i % 500}.", "faq": []}
+        if i % 7 == 0:
+            del d["link"]
+        out.append(d)
+    return out
+
+def legacy_normalise(d):
+    """The per-card safe_int / safe_str closures build_card_record used to define."""
+    def safe_int(key):
+        val = d.get(key, '-')
+        if not val or val == '-' or val == 'N/A':
+            return None
+        clean = re.sub(r'\D', '', str(val))
+        return int(clean) if clean else None
+
+    def safe_str(key, default='-'):
+        val = d.get(key, default)
+        if not val or val == '-' or val == 'N/A':
+            return None
+        return val.strip()
+
+    return {"cost": safe_int('cost'), "hp": safe_int('hp'), "ap": safe_int('ap'), "level": safe_int('level'),
+            "color": safe_str('color'), "trait": safe_str('trait'), "link": safe_str('link'),
+            "effect_text": safe_str('text', ''), "zone": safe_str('zone'), "source": safe_str('source'),
+            "product": safe_str('product_name')}
+
+def bench_normalize(args):
+    """Per-card closures vs the table-driven normalize.normalise_batch over synthetic detail dicts."""
+    details = synthetic_details(args.records)
+    old, t_old = timed(lambda: [legacy_normalise(d) for d in details])
+    single, t_single = timed(lambda: [normalize.normalise_details(d) for d in details])
+    batch, t_batch = timed(normalize.normalise_batch, details)
+    print(f"{len(details)} detail dicts")
+    print(f"closures per card      {t_old * 1000:8.1f} ms")
+    print(f"normalise_details      {t_single * 1000:8.1f} ms  ({t_old / t_single:.1f}x)")
+    print(f"normalise_batch        {t_batch * 1000:8.1f} ms  ({t_old / t_batch:.1f}x, identical: {old == single == batch})")
+
+def bench_export(args):
+    """Startup + first query: json.load of cards.json vs the SQLite export vs the memory-mapped columns."""
+    import sqlite3
+    with tempfile.TemporaryDirectory() as tmp:
+        cards_path = os.path.join(tmp, "cards.json")
+        with card_stream.CardWriter(cards_path) as writer:
+            writer.write_all(synthetic_records(args.records))
+        db_path, columns = os.path.join(tmp, "cards.sqlite"), os.path.join(tmp, "columns")
+        _, elapsed = timed(export_db.export, db_path, cards_path, None, None, columns)
+        print(f"export: {elapsed:.2f}s for {args.records} records")
+
+        def from_json():
+            with open(cards_path, 'r', encoding='utf-8') as f:
+                cards = json.load(f)
+            return sorted(c['id'] for c in cards if c['color'] == "Blue" and c['cost'] is not None and c['cost'] <= 2
+                          and c['id'] == c['card_no'])
+
+        def from_sqlite():
+            db = sqlite3.connect(db_path)
+            ids = [r[0] for r in db.execute("SELECT id FROM cards WHERE color = 'Blue' AND cost <= 2 AND id = card_no")]
+            db.close()
+            return sorted(ids)
+
+        def from_columns():
+            store = export_db.ColumnStore(columns)
+            cost = store.ints("cost")
+            hits = [i for i in range(store.count) if 0 <= cost[i] <= 2]
+            return sorted(i for i in (store.string("id", i) for i in hits if store.string("color", i) == "Blue")
+                          if "_p" not in i)
+
+        for label, fn in [("json.load + scan", from_json), ("sqlite query", from_sqlite), ("mmap columns", from_columns)]:
+            hits, elapsed, peak = measure(fn)
+            print(f"{label:<18} {elapsed * 1000:8.1f} ms  peak {peak:6.1f} MB  {len(hits)} hits")
+
+def synthetic_decks(cards, count, seed=1):
+    """decks.json-shaped user decks: 50 cards in 1-4 copies, two colors each."""
+    rng = random.Random(seed)
+    by_color = {}
+    for c in cards:
+        if c['id'] == c['card_no'] and c['color']:
+            by_color.setdefault(c['color'], []).append(c['card_no'])
+    colors = sorted(by_color)
+    decks = []
+    for _ in range(count):
+        pool = by_color[rng.choice(colors)] + by_color[rng.choice(colors)]
+        entries, total = [], 0
+        while total < 50:
+            qty = min(rng.randint(1, 4), 50 - total)
+            entries.append({"card_no": rng.choice(pool), "quantity": qty})
+            total += qty
+        decks.append({"name": "user", "cards": entries})
+    return decks
+
+def joined_deck_stats(by_no, deck):
+    """What consumers did before deck_stats: join every entry back to its card dict."""
+    cap = deck_stats.CURVE_CAP
+    cost_curve, level_curve = [0] * (cap + 1), [0] * (cap + 1)
+    no_cost = no_level = total = 0
+    colors, types, unknown = {}, {}, []
+    for entry in deck['cards']:
+        card, qty = by_no.get(entry['card_no']), entry['quantity']
+        if card is None:
+            unknown.append(entry['card_no'])
+            continue
+        total += qty
+        if card['cost'] is None: no_cost += qty
+        else: cost_curve[min(card['cost'], cap)] += qty
+        if card['level'] is None: no_level += qty
+        else: level_curve[min(card['level'], cap)] += qty
+        colors[card['color']] = colors.get(card['color'], 0) + qty
+        types[card['type']] = types.get(card['type'], 0) + qty
+    costed, levelled = sum(cost_curve), sum(level_curve)
+    return {
+        "cards": total, "cost_curve": tuple(cost_curve), "level_curve": tuple(level_curve),
+        "no_cost": no_cost, "no_level": no_level,
+        "avg_cost": round(sum(i * n for i, n in enumerate(cost_curve)) / costed, 3) if costed else None,
+        "avg_level": round(sum(i * n for i, n in enumerate(level_curve)) / levelled, 3) if levelled else None,
+        "colors": colors, "types": types, "unknown": tuple(sorted(set(unknown))),
+    }
+
+def bench_decks(args):
+    """Per-deck joins against card dicts vs DeckStats (cold, then from the content-hash cache) over user decks."""
+    cards = card_query.load_card_list("cards.json")
+    decks = synthetic_decks(cards, args.records)
+    stats, build = timed(deck_stats.DeckStats, cards, max(deck_stats.CACHE_SIZE, len(decks)))
+    print(f"stat vectors: {build * 1000:.1f} ms for {len(stats.card_nos)} cards")
+
+    by_no = {}
+    for c in cards:
+        by_no.setdefault(c['card_no'], c)
+    joined, t_join = timed(lambda: [joined_deck_stats(by_no, d) for d in decks])
+    cold, t_cold = timed(stats.analyze_many, decks)
+    warm, t_warm = timed(stats.analyze_many, decks)
+    same = joined == cold == warm
+    for label, elapsed in [("join per deck", t_join), ("DeckStats cold", t_cold), ("DeckStats cached", t_warm)]:
+        print(f"{label:<18} {elapsed * 1000:8.1f} ms  {len(decks) / elapsed:10,.0f} decks/s")
+    print(f"same aggregates: {same}, cache hits {stats.hits} / misses {stats.misses}")
+
+def bench_lookup(args):
+    """Startup + single-card lookups: json.load of cards.json vs the memory-mapped CardLookup."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cards_path = os.path.join(tmp, "cards.json")
+        with card_stream.CardWriter(cards_path) as writer:
+            writer.write_all(synthetic_records(args.records))
+        records, index = os.path.join(tmp, card_lookup.RECORDS_FILE), os.path.join(tmp, card_lookup.INDEX_FILE)
+        _, elapsed = timed(card_lookup.build, cards_path, records, index)
+        print(f"build: {elapsed:.2f}s for {args.records} records, "
+              f"{os.path.getsize(records) / 1e6:.1f} MB records (cards.json {os.path.getsize(cards_path) / 1e6:.1f} MB)")
+        wanted = random.Random(1).sample([c['id'] for c in card_stream.iter_cards(cards_path)], min(1000, args.records))
+
+        def from_json():
+            with open(cards_path, 'r', encoding='utf-8') as f:
+                by_id = {c['id']: c for c in json.load(f)}
+            return by_id
+
+        def from_lookup():
+            return card_lookup.CardLookup(index, records)
+
+        for label, open_db in [("json.load", from_json), ("CardLookup", from_lookup)]:
+            db, startup, peak = measure(open_db)
+            first, cold = timed(lambda: [db[i] for i in wanted])
+            _, warm = timed(lambda: [db[i] for i in wanted])
+            print(f"{label:<11} startup {startup * 1000:8.1f} ms  peak {peak:6.1f} MB  "
+                  f"lookup {cold / len(wanted) * 1e6:6.1f} us cold, {warm / len(wanted) * 1e6:5.1f} us cached")
+            if label == "json.load":
+                expected = first
+        print(f"identical cards: {first == expected}")
+
+BENCHMARKS = {
+    "cache": bench_cache,
+    "decks": bench_decks,
+    "enrich": bench_enrich,
+    "export": bench_export,
+    "feed": bench_feed,
+    "images": bench_images,
+    "lookup": bench_lookup,
+    "merge": bench_merge,
+    "normalize": bench_normalize,
+    "parse": bench_parse,
+    "query": bench_query,
+    "reconcile": bench_reconcile,
+    "replay": bench_replay,
+    "resume": bench_resume,
+    "search": bench_search,
+    "shards": bench_shards,
+    "write": bench_write,
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--cards", type=int, default=60, help="stub cards in the set")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub server latency per request (s)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2, help="process pool size for 'shards'")
+    parser.add_argument("--rate", type=float, default=0, help="per-host rate limit (req/s, 0 = off)")
+    parser.add_argument("--records", type=int, default=20000, help="synthetic card records for 'write', 'query', 'merge', 'feed', 'normalize', 'lookup'; decks for 'decks'")
+    parser.add_argument("--repeat", type=int, default=20, help="repetitions per query for 'query'")
+    parser.add_argument("--fixtures", help="directory of saved detail pages (*.html) for 'parse'")
+    parser.add_argument("--archive", help="archive from 'python replay.py record' for 'replay' (default: record the stub)")
+    return parser
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    BENCHMARKS[args.benchmark](args)
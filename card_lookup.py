@@ -0,0 +1,183 @@
+"""
+Memory-mapped, lazily decoded card lookup for processes that serve cards.
+
+`build` turns cards.json (or cards.ndjson) into two files:
+
+    cards.rec   the records, one compact JSON object per line, in cards.json
+                order; a parallel that only differs from its base card in
+                id, image_url and rarity is stored as just those fields
+                (the compact_store rule)
+    cards.idx   a header plus fixed-width slots sorted by card id:
+                id -> byte range in cards.rec, and the base card's slot for
+                such parallels
+
+`CardLookup` memory-maps both files and decodes a card only when it is
+asked for, keeping the most recently used ones in an LRU cache. Opening it
+reads a 24-byte header, whatever the size of the card pool, and a lookup is
+a binary search over the mapped slots (results, misses included, are cached
+per card id). The mapped pages live in the OS page cache, so forked workers
+(or any processes opening the same files) share them instead of each
+holding a parsed copy of cards.json:
+
+    from card_lookup import CardLookup
+    cards = CardLookup.open()
+    cards["GD01-001_p1"]      # KeyError if unknown
+    cards.get("ST01-001")     # None if unknown
+
+Decoded cards are cached and shared between callers: treat them as read-only.
+
+    python card_lookup.py cards.json       # writes cards.rec + cards.idx
+"""
+import argparse
+import functools
+import json
+import mmap
+import os
+import struct
+
+import card_stream
+import compact_store
+
+RECORDS_FILE = "cards.rec"
+INDEX_FILE = "cards.idx"
+MAGIC = b"cardidx1"
+KEY_SIZE = 32                                  # card ids are NUL-padded to this many UTF-8 bytes
+HEADER = struct.Struct("<8sIIQ")               # magic, slot count, key size, records file size
+SLOT = struct.Struct(f"<{KEY_SIZE}sQIi")       # id, offset, length, base slot (-1 = full record)
+CACHE_SIZE = 4096  # decoded cards kept per process
+
+RECORD_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+def slot_key(card_id):
+    key = card_id.encode('utf-8')
+    if len(key) > KEY_SIZE:
+        raise ValueError(f"Card id {card_id!r} is longer than {KEY_SIZE} bytes")
+    return key.ljust(KEY_SIZE, b"\0")
+
+def build(cards_path="cards.json", records_path=RECORDS_FILE, index_path=INDEX_FILE):
+    """Writes the record file and its index (each to a temp file, then swapped in). Returns the card count."""
+    entries = []  # (key, offset, length, base id)
+    bases = {}
+    offset = 0
+    with open(f"{records_path}.tmp", 'wb') as f:
+        for card in card_stream.iter_cards(cards_path):
+            if card['id'] == card['card_no']:
+                bases.setdefault(card['card_no'], card)
+            if compact_store.is_reference(card, bases.get(card['card_no'])):
+                record, base = {k: card[k] for k in compact_store.VARIANT_FIELDS}, card['card_no']
+            else:
+                record, base = card, None
+            data = (RECORD_ENCODER.encode(record) + "\n").encode('utf-8')
+            entries.append((slot_key(card['id']), offset, len(data) - 1, base))
+            f.write(data)
+            offset += len(data)
+
+    entries.sort(key=lambda e: e[0])
+    slots = {key: i for i, (key, *_) in enumerate(entries)}
+    if len(slots) != len(entries):
+        raise ValueError(f"{cards_path} has duplicate card ids")
+    with open(f"{index_path}.tmp", 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(entries), KEY_SIZE, offset))
+        for key, start, length, base in entries:
+            f.write(SLOT.pack(key, start, length, -1 if base is None else slots[slot_key(base)]))
+
+    os.replace(f"{records_path}.tmp", records_path)
+    os.replace(f"{index_path}.tmp", index_path)
+    return len(entries)
+
+def map_file(path):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+class CardLookup:
+    """Read-only card id -> card mapping over a memory-mapped record file."""
+
+    def __init__(self, index_path=INDEX_FILE, records_path=RECORDS_FILE, cache_size=CACHE_SIZE):
+        self.index = map_file(index_path)
+        self.records = map_file(records_path)
+        if len(self.index) < HEADER.size:
+            raise ValueError(f"{index_path} is not a card index")
+        magic, self.count, key_size, size = HEADER.unpack_from(self.index)
+        if magic != MAGIC or key_size != KEY_SIZE:
+            raise ValueError(f"{index_path} is not a {MAGIC.decode()} card index")
+        if size != len(self.records):
+            raise ValueError(f"{index_path} does not match {records_path}; rebuild it")
+        self.card = functools.lru_cache(maxsize=cache_size)(self._load)
+
+    @classmethod
+    def open(cls, directory=".", cache_size=CACHE_SIZE):
+        return cls(os.path.join(directory, INDEX_FILE), os.path.join(directory, RECORDS_FILE), cache_size)
+
+    def _slot(self, i):
+        return SLOT.unpack_from(self.index, HEADER.size + i * SLOT.size)
+
+    def find(self, card_id):
+        """Slot of card_id, or None."""
+        try:
+            key = slot_key(card_id)
+        except ValueError:
+            return None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = HEADER.size + mid * SLOT.size
+            if self.index[start:start + KEY_SIZE] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self.index[HEADER.size + lo * SLOT.size:HEADER.size + lo * SLOT.size + KEY_SIZE] == key:
+            return lo
+        return None
+
+    def slot_id(self, i):
+        return self._slot(i)[0].rstrip(b"\0").decode('utf-8')
+
+    def _decode(self, i):
+        _, offset, length, base = self._slot(i)
+        record = json.loads(self.records[offset:offset + length])
+        if base < 0:
+            return record
+        return compact_store.expand_reference(record, self.card(self.slot_id(base)))
+
+    def _load(self, card_id):
+        i = self.find(card_id)
+        return None if i is None else self._decode(i)
+
+    def get(self, card_id, default=None):
+        card = self.card(card_id)
+        return default if card is None else card
+
+    def __getitem__(self, card_id):
+        card = self.card(card_id)
+        if card is None:
+            raise KeyError(card_id)
+        return card
+
+    def __contains__(self, card_id):
+        return self.find(card_id) is not None
+
+    def __len__(self):
+        return self.count
+
+    def ids(self):
+        """Every card id, sorted."""
+        return [self.slot_id(i) for i in range(self.count)]
+
+    def __iter__(self):
+        """Every card, in cards.json order (decoded one at a time, bypassing the cache)."""
+        for i in sorted(range(self.count), key=lambda i: self._slot(i)[1]):
+            yield self._decode(i)
+
+    def close(self):
+        for m in (self.index, self.records):
+            if isinstance(m, mmap.mmap):
+                m.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds the memory-mapped card lookup files from cards.json.")
+    parser.add_argument("source", nargs="?", default="cards.json")
+    parser.add_argument("--records", default=RECORDS_FILE)
+    parser.add_argument("--index", default=INDEX_FILE)
+    args = parser.parse_args()
+    count = build(args.source, args.records, args.index)
+    print(f"💾 Indexed {count} cards: {args.index} -> {args.records}")
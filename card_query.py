@@ -0,0 +1,131 @@
+"""
+Indexed queries over the generated card database.
+
+`CardDB` loads cards.json (or cards.ndjson / cards.compact.json) and
+decks.json once and builds secondary indexes on set, color, type, rarity,
+cost, level, trait tokens and link tokens. A query intersects the matching
+posting sets, smallest first, instead of scanning every card:
+
+    from card_query import CardDB
+    db = CardDB.load()
+    db.query(color="Blue", type="UNIT", cost_max=3, trait="Earth Federation")
+    db.deck_cards("ST04")
+
+Values are matched case-insensitively. Passing a list/tuple/set for a field
+matches any of its values. Results keep cards.json order.
+"""
+import json
+import re
+
+import card_stream
+import compact_store
+
+TRAIT_TOKEN = re.compile(r'\(([^)]+)\)')
+LINK_TOKEN = re.compile(r'\[([^\]]+)\]')
+
+EXACT_FIELDS = ("set", "color", "type", "rarity", "card_no")
+RANGE_FIELDS = ("cost", "level")
+
+def tokens(value, pattern):
+    """'(Earth Federation) (White Base Team)' -> ['earth federation', 'white base team']."""
+    if not value: return []
+    found = pattern.findall(value)
+    return [t.strip().lower() for t in found] if found else [value.strip().lower()]
+
+def key(value):
+    return value.lower() if isinstance(value, str) else value
+
+def load_card_list(path):
+    """Cards from a cards.json array, cards.ndjson or a compact store."""
+    with open(path, 'r', encoding='utf-8') as f:
+        head = f.read(64).lstrip()
+    if head.startswith('{"format"'):
+        return compact_store.load_cards(path)
+    return list(card_stream.iter_cards(path))
+
+class CardDB:
+    """In-memory card list with precomputed secondary indexes."""
+
+    def __init__(self, cards, decks=None):
+        self.cards = list(cards)
+        self.decks = decks or {}
+        self.by_id = {}
+        self.indexes = {field: {} for field in EXACT_FIELDS + RANGE_FIELDS + ("trait", "link")}
+        self.base = set()
+
+        for pos, card in enumerate(self.cards):
+            self.by_id.setdefault(card['id'], pos)
+            if card['id'] == card['card_no']:
+                self.base.add(pos)
+            for field in EXACT_FIELDS + RANGE_FIELDS:
+                self.indexes[field].setdefault(key(card.get(field)), set()).add(pos)
+            for t in tokens(card.get('trait'), TRAIT_TOKEN):
+                self.indexes['trait'].setdefault(t, set()).add(pos)
+            for t in tokens(card.get('link'), LINK_TOKEN):
+                self.indexes['link'].setdefault(t, set()).add(pos)
+
+    @classmethod
+    def load(cls, cards_path="cards.json", decks_path="decks.json"):
+        decks = {}
+        if decks_path:
+            with open(decks_path, 'r', encoding='utf-8') as f:
+                decks = json.load(f)
+        return cls(load_card_list(cards_path), decks)
+
+    def get(self, card_id):
+        pos = self.by_id.get(card_id)
+        return None if pos is None else self.cards[pos]
+
+    def _lookup(self, field, value):
+        index = self.indexes[field]
+        if isinstance(value, (list, tuple, set, frozenset)):
+            hits = set()
+            for v in value:
+                hits |= index.get(key(v), set())
+            return hits
+        return index.get(key(value), set())
+
+    def _range(self, field, lo, hi):
+        hits = set()
+        for value, postings in self.indexes[field].items():
+            if value is None: continue
+            if (lo is None or value >= lo) and (hi is None or value <= hi):
+                hits |= postings
+        return hits
+
+    def query_positions(self, parallels=True, **criteria):
+        """Sorted card positions matching every criterion."""
+        candidates = [] if parallels else [self.base]
+        for name, value in criteria.items():
+            if value is None: continue
+            field, _, bound = name.rpartition("_")
+            if field in RANGE_FIELDS and bound in ("min", "max"):
+                lo, hi = (value, None) if bound == "min" else (None, value)
+                candidates.append(self._range(field, lo, hi))
+            elif name in self.indexes:
+                candidates.append(self._lookup(name, value))
+            else:
+                raise ValueError(f"Unknown query field {name!r}")
+
+        if not candidates:
+            return list(range(len(self.cards)))
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for postings in candidates[1:]:
+            if not result: break
+            result &= postings
+        return sorted(result)
+
+    def query(self, parallels=True, **criteria):
+        """
+        Cards matching every criterion. Fields: set, color, type, rarity,
+        card_no, cost, level, trait, link, plus cost_min/cost_max and
+        level_min/level_max. parallels=False drops _pN variants.
+        """
+        return [self.cards[pos] for pos in self.query_positions(parallels, **criteria)]
+
+    def deck_cards(self, deck_id):
+        """[(card, quantity)] for a deck in decks.json."""
+        deck = self.decks.get(deck_id)
+        if not deck: return []
+        return [(self.get(entry['card_no']), entry['quantity']) for entry in deck['cards']]
@@ -0,0 +1,145 @@
+"""
+Streaming reader / writer for the card database.
+
+`CardWriter` appends card records as main() finalises each set instead of
+holding every card until the end. Two formats are supported:
+
+    json    the usual cards.json array, byte-identical to json.dump(cards, indent=2)
+    ndjson  one compact JSON object per line (cards.ndjson)
+
+Output goes to a temp file that replaces the target only when the writer
+closes cleanly, so a crashed run never leaves a truncated file behind.
+
+`iter_cards` reads either format back as a generator with constant memory,
+so a consumer can scan or filter cards without loading the whole array:
+
+    from card_stream import iter_cards
+    blue = [c for c in iter_cards("cards.json") if c["color"] == "Blue"]
+"""
+import json
+import os
+from contextlib import contextmanager
+
+FORMATS = ("json", "ndjson")
+READ_CHUNK = 64 * 1024
+
+ARRAY_ITEM_ENCODER = json.JSONEncoder(indent=2)
+LINE_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+@contextmanager
+def atomic_write(path):
+    """Text file handle on path.tmp; it replaces path only when the block finishes cleanly."""
+    tmp = f"{path}.tmp"
+    f = open(tmp, 'w', encoding='utf-8')
+    try:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+    except BaseException:
+        f.close()
+        os.remove(tmp)
+        raise
+    f.close()
+    os.replace(tmp, path)
+
+class CardWriter:
+    """Context manager writing card records one at a time. Duplicate ids are skipped."""
+
+    def __init__(self, path, fmt="json"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown card format {fmt!r} (expected one of {FORMATS})")
+        self.path = path
+        self.fmt = fmt
+        self.tmp_path = f"{path}.tmp"
+        self.seen = set()
+        self.count = 0
+        self.f = None
+
+    def __enter__(self):
+        self.f = open(self.tmp_path, 'w', encoding='utf-8')
+        return self
+
+    def write(self, card):
+        if card['id'] in self.seen: return
+        self.seen.add(card['id'])
+        if self.fmt == "ndjson":
+            self.f.write(LINE_ENCODER.encode(card) + "\n")
+        else:
+            # Same bytes json.dump(list, indent=2) emits for an array element
+            self.f.write("[\n  " if self.count == 0 else ",\n  ")
+            self.f.write(ARRAY_ITEM_ENCODER.encode(card).replace("\n", "\n  "))
+        self.count += 1
+
+    def write_all(self, cards):
+        for card in cards:
+            self.write(card)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            if self.fmt == "json":
+                self.f.write("\n]" if self.count else "[]")
+            self.f.flush()
+            os.fsync(self.f.fileno())
+        self.f.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
+        return False
+
+def iter_json_array(chunks):
+    """Yields the elements of a JSON array arriving as an iterable of str chunks."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    chunks = iter(chunks)
+    done = False
+    while not done:
+        chunk = next(chunks, None)
+        done = chunk is None
+        buf = buf[pos:] + (chunk or "")
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf): break
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if done: raise
+                break  # element continues in the next chunk
+            if not done and (end == len(buf) or buf[end] not in " \t\r\n,]"):
+                break  # a number cut off by the chunk boundary (e.g. "12" of "12.5")
+            yield item
+            pos = end
+    raise ValueError("Truncated JSON array")
+
+def iter_file_chunks(f, size=READ_CHUNK):
+    while True:
+        chunk = f.read(size)
+        if not chunk: return
+        yield chunk
+
+def iter_cards(path, predicate=None):
+    """Yields card records from a cards.json array or a cards.ndjson file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        f.seek(0)
+        if head == "[":
+            records = iter_json_array(iter_file_chunks(f))
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for card in records:
+            if predicate is None or predicate(card):
+                yield card
@@ -0,0 +1,112 @@
+"""
+Crash-resumable crawl journal (append-only JSONL).
+
+Every unit of finished work is appended as soon as it is done, one JSON
+object per line:
+
+    {"kind": "listing", "set": "GD01", "cards": [...list-view cards...], "last_card": 102}
+    {"kind": "card", "set": "GD01", "card": {...enriched list-view card...}}
+    {"kind": "parallels", "set": "GD01", "counts": {"GD01-001": 2, ...}}
+    {"kind": "set", "set": {...set meta...}, "manifest": {...}, "cards": ["GD01-001", ...], "records": [...]}
+
+A "set" entry lists the set's card numbers in output order, but only holds
+the records of cards its crawl didn't enrich into a "card" entry and a
+parallel count (carried forward, or whose detail page failed); the rest are
+rebuilt from those entries, so the journal doesn't store every card twice.
+
+`python main.py --resume` reloads the journal of the failed run and skips
+whatever it already holds: finished sets are taken as they are, and a set
+that was cut off reuses its listing and only re-enriches the cards that
+are missing. A clean run deletes the journal at the end.
+
+Entries are only read back when resuming: a run keeps the card numbers it
+journaled, not the entries themselves.
+
+Lines are written with a single O_APPEND write, so threads and the
+--workers processes can share the file; a line cut off by a crash is
+ignored on load.
+"""
+import json
+import os
+import threading
+
+JOURNAL_FILE = "crawl_journal.jsonl"
+
+class Journal:
+    """Append-only log of set listings, enriched cards, parallel counts and finished sets."""
+
+    def __init__(self, path=JOURNAL_FILE, resume=False, truncate=True):
+        self.path = path
+        self.resume = resume
+        self.lock = threading.Lock()
+        self.listings = {}
+        self.cards = {}
+        self.parallels = {}
+        self.sets = {}
+        self.journaled = set()  # (set id, card_no) of the "card" entries this process appended
+        self.rebuildable = {}  # set id -> card_nos its crawl enriched, each with a "card" entry and parallel count
+        if resume:
+            self.load()
+        elif truncate and os.path.exists(path):
+            os.remove(path)
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def load(self):
+        if not os.path.exists(self.path): return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line
+                self.apply(entry)
+
+    def apply(self, entry):
+        kind = entry.get("kind")
+        if kind == "listing":
+            self.listings[entry["set"]] = entry
+        elif kind == "card":
+            self.cards.setdefault(entry["set"], {})[entry["card"]["card_no"]] = entry["card"]
+        elif kind == "parallels":
+            self.parallels[entry["set"]] = entry["counts"]
+        elif kind == "set":
+            self.sets[entry["set"]["id"]] = entry
+
+    def append(self, entry):
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self.lock:
+            os.write(self.fd, line)
+
+    def listing_done(self, set_id, cards, last_card=None):
+        self.append({"kind": "listing", "set": set_id, "cards": cards, "last_card": last_card})
+
+    def card_done(self, set_id, card):
+        self.append({"kind": "card", "set": set_id, "card": card})
+        with self.lock:
+            self.journaled.add((set_id, card['card_no']))
+
+    def has_card(self, set_id, card_no):
+        """Whether the journal holds card_no's enriched card, from this run or the one being resumed."""
+        return card_no in self.cards.get(set_id, ()) or (set_id, card_no) in self.journaled
+
+    def parallels_done(self, set_id, counts):
+        self.append({"kind": "parallels", "set": set_id, "counts": counts})
+
+    def cards_enriched(self, set_id, card_nos):
+        """The cards of set_id the running crawl enriched, whose records set_done can leave out."""
+        with self.lock:
+            self.rebuildable[set_id] = {no for no in card_nos if self.has_card(set_id, no)}
+
+    def set_done(self, set_meta, manifest_entry, records):
+        set_id = set_meta['id']
+        with self.lock:
+            rebuildable = self.rebuildable.pop(set_id, set())
+        self.append({"kind": "set", "set": set_meta, "manifest": manifest_entry,
+                     "cards": list(dict.fromkeys(r['card_no'] for r in records)),
+                     "records": [r for r in records if r['card_no'] not in rebuildable]})
+
+    def close(self, finished=False):
+        """Closes the file; a finished run removes it."""
+        os.close(self.fd)
+        if finished and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,92 @@
+"""
+Compact card store that deduplicates parallel variants.
+
+In cards.json every `_pN` parallel is a full copy of its base card
+(effect_text, faq and all). The compact format keeps each base card once and
+stores a variant as a reference to its base `card_no` plus the only fields
+that differ:
+
+    {
+      "format": "compact-v2",
+      "cards": [ ...base records, exactly as in cards.json... ],
+      "variants": [ {"card_no": "ST01-001", "id": "ST01-001_p1", "image_url": "...", "rarity": "LR+",
+                     "position": 1}, ... ]
+    }
+
+A variant that differs from its base in any other field stays a full record
+in "cards". Each reference keeps its position in the original list, so
+`expand` always returns the original list, in order.
+
+    python compact_store.py cards.json cards.compact.json
+"""
+import argparse
+import json
+
+import card_stream
+
+FORMAT = "compact-v2"
+VARIANT_FIELDS = ("id", "image_url", "rarity")
+
+def is_reference(card, base):
+    """True when card only differs from its base in VARIANT_FIELDS."""
+    if base is None or card['id'] == card['card_no']: return False
+    return all(card.get(k) == base.get(k) for k in card.keys() | base.keys() if k not in VARIANT_FIELDS)
+
+def compact(cards):
+    """Compact form of an iterable of cards.json records."""
+    bases = {}
+    out_cards = []
+    variants = []
+    for position, card in enumerate(cards):
+        if card['id'] == card['card_no']:
+            bases.setdefault(card['card_no'], card)
+        if is_reference(card, bases.get(card['card_no'])):
+            variants.append({"card_no": card['card_no'], **{k: card[k] for k in VARIANT_FIELDS}, "position": position})
+        else:
+            out_cards.append(card)
+    return {"format": FORMAT, "cards": out_cards, "variants": variants}
+
+def expand_reference(v, base):
+    # Rebuild the key order of a find_parallels copy
+    return {k: v[k] if k in VARIANT_FIELDS else val for k, val in base.items()}
+
+def iter_expanded(store):
+    """Yields full cards.json records from a compact store, in the original order."""
+    if store.get("format") != FORMAT:
+        raise ValueError(f"Unsupported card store format {store.get('format')!r}")
+
+    bases = {}
+    refs = iter(store["variants"])
+    ref = next(refs, None)
+    position = 0
+    for card in store["cards"]:
+        # References sit at the positions the full records don't take
+        while ref is not None and ref["position"] == position:
+            yield expand_reference(ref, bases[ref['card_no']])
+            ref, position = next(refs, None), position + 1
+        if card['id'] == card['card_no']:
+            bases.setdefault(card['card_no'], card)
+        yield card
+        position += 1
+    while ref is not None:
+        yield expand_reference(ref, bases[ref['card_no']])
+        ref = next(refs, None)
+
+def expand(store):
+    return list(iter_expanded(store))
+
+def write_compact(cards, path):
+    with card_stream.atomic_write(path) as f:
+        json.dump(compact(cards), f, ensure_ascii=False, separators=(",", ":"))
+
+def load_cards(path):
+    """Loads a compact store and expands it back into the cards.json shape."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return expand(json.load(f))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts cards.json (or cards.ndjson) into the compact store.")
+    parser.add_argument("source", nargs="?", default="cards.json")
+    parser.add_argument("target", nargs="?", default="cards.compact.json")
+    args = parser.parse_args()
+    write_compact(card_stream.iter_cards(args.source), args.target)
@@ -0,0 +1,247 @@
+"""
+Deck analytics over decks.json and user-supplied decklists.
+
+`DeckStats` reads cards.json once into per-card columns (cost, level and
+color / type codes) and precomputes, for every card, which histogram bins it
+falls into. Analysing a deck is one pass over its entries to sum quantities
+per card, then a few list lookups per card, with no join back to the card
+dicts:
+
+    from deck_stats import DeckStats
+    stats = DeckStats.load()
+    stats.analyze(decks["ST01"])                      # a decks.json deck
+    stats.analyze({"GD01-001": 4, "ST01-010": 2})     # {card_no: quantity}
+    stats.analyze_many(decklists)                      # cached
+    stats.analyze_decks(decks)                         # {deck_id: result}
+
+A decklist may be a decks.json deck ({"cards": [{"card_no", "quantity"}]}),
+a list of such entries, a list of card ids (one copy each), a
+{card_no: quantity} dict, or text with one "4 GD01-001" / "GD01-001 x4"
+line per entry (`parse_decklist`). Parallel ids (GD01-001_p1) count as
+their base card.
+
+Results are cached under the deck's content (its sorted card / quantity
+pairs, so entry order, split entries and parallel ids don't matter); the
+per-card sums that make the key are the ones the aggregation uses, so a
+deck that was already seen costs that pass plus one hash lookup. Cached
+results are shared: treat them as read-only.
+
+    python deck_stats.py                          # every deck in decks.json
+    python deck_stats.py my_deck.txt --out stats.json
+"""
+import argparse
+import json
+import re
+from array import array
+from collections import OrderedDict
+from operator import mul
+
+import card_query
+
+CURVE_CAP = 10      # costs / levels above this share the last bin ("10+")
+CACHE_SIZE = 65536  # distinct decks kept in the result cache
+NO_VALUE = -1
+CURVE_VALUES = range(CURVE_CAP + 1)
+DECKLIST_LINE = re.compile(r'^\s*(?:(\d+)\s*x?\s+(\S+)|(\S+?)\s*(?:x\s*(\d+))?)\s*$', re.IGNORECASE)
+
+def parse_decklist(text):
+    """'4 GD01-001' / '4x GD01-001' / 'GD01-001 x4' / 'GD01-001' lines -> {card_no: quantity}."""
+    counts = {}
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line: continue
+        m = DECKLIST_LINE.match(line)
+        if not m:
+            raise ValueError(f"Unreadable decklist line {line!r}")
+        qty, card_no = (m.group(1), m.group(2)) if m.group(2) else (m.group(4), m.group(3))
+        counts[card_no] = counts.get(card_no, 0) + int(qty or 1)
+    return counts
+
+def deck_counts(decklist):
+    """Any accepted decklist shape -> {card_no: quantity} with duplicates summed."""
+    if isinstance(decklist, str):
+        decklist = parse_decklist(decklist)
+    elif isinstance(decklist, dict) and isinstance(decklist.get("cards"), list):
+        decklist = decklist["cards"]
+    if isinstance(decklist, dict):
+        return {card_no: qty for card_no, qty in decklist.items() if qty}
+    counts = {}
+    for entry in decklist:
+        if isinstance(entry, str):
+            counts[entry] = counts.get(entry, 0) + 1
+        else:
+            card_no = entry['card_no']
+            counts[card_no] = counts.get(card_no, 0) + entry.get('quantity', 1)
+    return counts
+
+class DeckStats:
+    """Per-card stat columns plus cached per-deck aggregates."""
+
+    def __init__(self, cards, cache_size=CACHE_SIZE):
+        self.rows = {}          # card id / card_no -> row
+        self.card_nos = []
+        self.colors, self.types = [], []
+        color_codes, type_codes = {}, {}
+        self.cost, self.level = array('i'), array('i')
+        self.color, self.type = array('H'), array('H')
+
+        for card in cards:
+            card_no = card['card_no']
+            if card_no in self.rows:
+                self.rows.setdefault(card['id'], self.rows[card_no])
+                continue
+            row = len(self.card_nos)
+            self.rows[card_no] = self.rows[card['id']] = row
+            self.card_nos.append(card_no)
+            for column, field in ((self.cost, 'cost'), (self.level, 'level')):
+                value = card.get(field)
+                column.append(NO_VALUE if value is None else value)
+            for column, codes, names, field in ((self.color, color_codes, self.colors, 'color'),
+                                                (self.type, type_codes, self.types, 'type')):
+                value = card.get(field)
+                if value not in codes:
+                    codes[value] = len(names)
+                    names.append(value)
+                column.append(codes[value])
+
+        # Histogram layout: cost bins 0..CURVE_CAP then "none", the same for level, then colors, then types.
+        curve = CURVE_CAP + 2
+        self.level_offset = curve
+        self.color_offset = 2 * curve
+        self.type_offset = self.color_offset + len(self.colors)
+        self.width = self.type_offset + len(self.types)
+        # Histogram bin each row counts towards, one list per histogram
+        self.cost_bin = [self._curve_bin(cost) for cost in self.cost]
+        self.level_bin = [self.level_offset + self._curve_bin(level) for level in self.level]
+        self.color_bin = [self.color_offset + color for color in self.color]
+        self.type_bin = [self.type_offset + kind for kind in self.type]
+
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _curve_bin(value):
+        return CURVE_CAP + 1 if value == NO_VALUE else min(value, CURVE_CAP)
+
+    @classmethod
+    def load(cls, cards_path="cards.json"):
+        return cls(card_query.load_card_list(cards_path))
+
+    def card(self, card_id):
+        """Stat vector entries for one card (None if unknown)."""
+        row = self.rows.get(card_id)
+        if row is None: return None
+        return {
+            "card_no": self.card_nos[row], "color": self.colors[self.color[row]], "type": self.types[self.type[row]],
+            **{k: (None if col[row] == NO_VALUE else col[row])
+               for k, col in (("cost", self.cost), ("level", self.level))},
+        }
+
+    def _counts(self, decklist):
+        """({row: quantity}, unknown card numbers) for any accepted decklist shape, duplicates summed."""
+        if isinstance(decklist, dict) and isinstance(decklist.get("cards"), list):
+            entries = decklist["cards"]  # decks.json, the common case: no intermediate dict
+        else:
+            entries = [{"card_no": card_no, "quantity": qty} for card_no, qty in deck_counts(decklist).items()]
+        rows, counts, unknown = self.rows, {}, set()
+        for entry in entries:
+            card_no = entry['card_no']
+            row = rows.get(card_no)
+            if row is None:
+                unknown.add(card_no)
+            else:
+                counts[row] = counts.get(row, 0) + entry.get('quantity', 1)
+        return counts, unknown
+
+    def _result(self, counts, unknown):
+        cost_bin, level_bin, color_bin, type_bin = self.cost_bin, self.level_bin, self.color_bin, self.type_bin
+        acc = [0] * self.width
+        for row, qty in counts.items():
+            acc[cost_bin[row]] += qty
+            acc[level_bin[row]] += qty
+            acc[color_bin[row]] += qty
+            acc[type_bin[row]] += qty
+
+        lo, co, to = self.level_offset, self.color_offset, self.type_offset
+        cost_curve, level_curve = tuple(acc[:CURVE_CAP + 1]), tuple(acc[lo:lo + CURVE_CAP + 1])
+        costed, levelled = sum(cost_curve), sum(level_curve)
+        return {
+            "cards": sum(acc[co:to]),
+            "cost_curve": cost_curve,
+            "level_curve": level_curve,
+            "no_cost": acc[CURVE_CAP + 1],
+            "no_level": acc[lo + CURVE_CAP + 1],
+            "avg_cost": round(sum(map(mul, cost_curve, CURVE_VALUES)) / costed, 3) if costed else None,
+            "avg_level": round(sum(map(mul, level_curve, CURVE_VALUES)) / levelled, 3) if levelled else None,
+            "colors": {self.colors[i]: n for i, n in enumerate(acc[co:to]) if n},
+            "types": {self.types[i]: n for i, n in enumerate(acc[to:]) if n},
+            "unknown": unknown,
+        }
+
+    def analyze(self, decklist):
+        """
+        Aggregates for one decklist: card count, cost / level curves (index =
+        value, the last bin is CURVE_CAP and above; cards without one are
+        counted in no_cost / no_level), averages, color and type splits, and
+        the card numbers that aren't in cards.json.
+        """
+        return self.analyze_many((decklist,))[0]
+
+    def analyze_many(self, decklists):
+        """analyze() for every decklist, in order; each distinct deck is aggregated once."""
+        cache, results = self.cache, []
+        for decklist in decklists:
+            counts, unknown = self._counts(decklist)
+            unknown = tuple(sorted(unknown))
+            key = tuple(sorted(counts.items())) + unknown
+            result = cache.get(key)
+            if result is None:
+                self.misses += 1
+                result = cache[key] = self._result(counts, unknown)
+                if len(cache) > self.cache_size:
+                    cache.popitem(last=False)
+            else:
+                self.hits += 1
+                cache.move_to_end(key)
+            results.append(result)
+        return results
+
+    def analyze_decks(self, decks):
+        """{deck_id: result} for a decks.json mapping."""
+        return dict(zip(decks, self.analyze_many(decks.values())))
+
+def load_decklist(path):
+    """A decklist file: JSON (any accepted shape) or plain text lines."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cost / level curves, color and type splits for decks.")
+    parser.add_argument("decklists", nargs="*", help="decklist files (JSON or '4 GD01-001' lines); default: decks.json")
+    parser.add_argument("--cards", default="cards.json")
+    parser.add_argument("--decks", default="decks.json")
+    parser.add_argument("--out", help="write the results as JSON instead of printing them")
+    args = parser.parse_args()
+
+    stats = DeckStats.load(args.cards)
+    if args.decklists:
+        results = {path: stats.analyze(load_decklist(path)) for path in args.decklists}
+    else:
+        with open(args.decks, 'r', encoding='utf-8') as f:
+            results = stats.analyze_decks(json.load(f))
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"📊 Wrote stats for {len(results)} decks to {args.out}")
+    else:
+        for name, r in results.items():
+            colors = ", ".join(f"{c} {n}" for c, n in r["colors"].items())
+            print(f"{name}: {r['cards']} cards, avg cost {r['avg_cost']}, curve {r['cost_curve'][1:8]}, {colors}")
+            if r["unknown"]:
+                print(f"   ⚠️ unknown cards: {', '.join(r['unknown'])}")
@@ -0,0 +1,214 @@
+"""
+Exports the card database into one indexed SQLite file (plus an optional
+column-oriented binary dump) for services that filter across columns.
+
+    python export_db.py                       # cards.json + decks.json (+ data.json / og_data.json) -> cards.sqlite
+    python export_db.py --columns columns/    # also write the columnar dump
+
+Tables:
+
+    cards       one row per base card (and per parallel that differs beyond its art)
+    variants    parallel art: _pN ids from cards.json, -ALTn ids from the exburst feed
+    faq         question / answer pairs per card, in page order
+    decks       starter decks
+    deck_cards  deck contents with quantities, in deck order
+    feed_cards  base cards of the exburst feed (og_main)
+    meta        format version and the source files' hashes
+
+The columnar dump writes one file per cards column: integers as int32
+arrays (NULL stored as -1) and strings as a uint32 offset array plus a UTF-8
+blob. columns.json describes them; `ColumnStore` memory-maps the files, so
+a consumer scans a column without parsing any JSON.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+from array import array
+
+import card_stream
+import compact_store
+import normalize
+
+FORMAT = "cards-sqlite-v1"
+DB_FILE = "cards.sqlite"
+OG_FILES = ("data.json", "og_data.json")  # og_main.JSON_FILE, or the checked-in copy
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE cards (
+    id TEXT PRIMARY KEY, card_no TEXT NOT NULL, name TEXT, image_url TEXT,
+    cost INTEGER, hp INTEGER, ap INTEGER, level INTEGER,
+    color TEXT, type TEXT, rarity TEXT, trait TEXT, link TEXT, effect_text TEXT,
+    zone TEXT, source TEXT, product TEXT, set_id TEXT, position INTEGER NOT NULL
+);
+CREATE TABLE variants (
+    id TEXT PRIMARY KEY, card_no TEXT NOT NULL, image_url TEXT, rarity TEXT, origin TEXT NOT NULL
+);
+CREATE TABLE faq (
+    card_no TEXT NOT NULL, position INTEGER NOT NULL, question TEXT, answer TEXT,
+    PRIMARY KEY (card_no, position)
+);
+CREATE TABLE decks (id TEXT PRIMARY KEY, name TEXT);
+CREATE TABLE deck_cards (
+    deck_id TEXT NOT NULL, position INTEGER NOT NULL, card_no TEXT NOT NULL, quantity INTEGER NOT NULL,
+    PRIMARY KEY (deck_id, position)
+);
+CREATE TABLE feed_cards (
+    card_no TEXT PRIMARY KEY, original_id TEXT, name TEXT, series TEXT, cost INTEGER, color TEXT,
+    rarity TEXT, ap INTEGER, effect TEXT, category TEXT, image_url TEXT, last_updated TEXT
+);
+CREATE INDEX cards_card_no ON cards (card_no);
+CREATE INDEX cards_set ON cards (set_id);
+CREATE INDEX cards_color ON cards (color);
+CREATE INDEX cards_type ON cards (type);
+CREATE INDEX cards_rarity ON cards (rarity);
+CREATE INDEX cards_cost ON cards (cost);
+CREATE INDEX cards_level ON cards (level);
+CREATE INDEX variants_card_no ON variants (card_no);
+CREATE INDEX deck_cards_card_no ON deck_cards (card_no);
+"""
+
+CARD_COLUMNS = ("id", "card_no", "name", "image_url", "cost", "hp", "ap", "level", "color", "type", "rarity",
+                "trait", "link", "effect_text", "zone", "source", "product", "set")
+INT_COLUMNS = ("cost", "hp", "ap", "level")
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def default_og_file():
+    return next((p for p in OG_FILES if os.path.exists(p)), None)
+
+def export(db_path=DB_FILE, cards_path="cards.json", decks_path="decks.json", og_path=None, columns_dir=None):
+    """Rebuilds db_path from the JSON outputs (written to a temp file, then swapped in)."""
+    cards = compact_store.compact(card_stream.iter_cards(cards_path))
+    decks = {}
+    if decks_path and os.path.exists(decks_path):
+        with open(decks_path, 'r', encoding='utf-8') as f:
+            decks = json.load(f)
+    feed = []
+    if og_path and os.path.exists(og_path):
+        with open(og_path, 'r', encoding='utf-8') as f:
+            feed = json.load(f)
+
+    tmp = f"{db_path}.tmp"
+    if os.path.exists(tmp): os.remove(tmp)
+    db = sqlite3.connect(tmp)
+    try:
+        db.executescript(SCHEMA)
+        sources = {"cards": cards_path, "decks": decks_path, "feed": og_path}
+        db.executemany("INSERT INTO meta VALUES (?, ?)", [("format", FORMAT)] + [
+            (f"{name}_sha256", file_hash(path)) for name, path in sources.items() if path and os.path.exists(path)
+        ])
+
+        db.executemany(
+            f"INSERT OR IGNORE INTO cards VALUES ({', '.join('?' * (len(CARD_COLUMNS) + 1))})",
+            (tuple(c.get(k) for k in CARD_COLUMNS) + (pos,) for pos, c in enumerate(cards["cards"])),
+        )
+        db.executemany(
+            "INSERT OR IGNORE INTO variants VALUES (?, ?, ?, ?, 'gcg')",
+            ((v['id'], v['card_no'], v['image_url'], v['rarity']) for v in cards["variants"]),
+        )
+        db.executemany(
+            "INSERT OR IGNORE INTO faq VALUES (?, ?, ?, ?)",
+            ((c['card_no'], i, e.get('question'), e.get('answer'))
+             for c in cards["cards"] if c['id'] == c['card_no'] for i, e in enumerate(c.get('faq') or [])),
+        )
+        db.executemany("INSERT INTO decks VALUES (?, ?)", ((deck_id, d.get('name')) for deck_id, d in decks.items()))
+        db.executemany(
+            "INSERT INTO deck_cards VALUES (?, ?, ?, ?)",
+            ((deck_id, i, e['card_no'], e['quantity']) for deck_id, d in decks.items() for i, e in enumerate(d['cards'])),
+        )
+        db.executemany(
+            "INSERT OR IGNORE INTO feed_cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((c['cardNo'], c.get('originalId'), c.get('name'), c.get('series'), normalize.to_int(c.get('cost')),
+              c.get('color'), c.get('rarity'), normalize.to_int(c.get('apData')), c.get('effectData'),
+              c.get('categoryData'), c.get('image'), c.get('last_updated')) for c in feed),
+        )
+        db.executemany(
+            "INSERT OR IGNORE INTO variants VALUES (?, ?, ?, ?, 'exburst')",
+            ((v['variantId'], c['cardNo'], v.get('image'), v.get('rarity')) for c in feed for v in c.get('variants') or []),
+        )
+        db.commit()
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    os.replace(tmp, db_path)
+
+    if columns_dir:
+        write_columns(cards["cards"], columns_dir)
+
+# --- COLUMNAR DUMP ---
+
+def write_columns(cards, directory):
+    """One binary file per cards column, described by columns.json."""
+    os.makedirs(directory, exist_ok=True)
+    described = {"format": "columns-v1", "count": len(cards), "columns": {}}
+    for name in CARD_COLUMNS:
+        values = [c.get(name) for c in cards]
+        if name in INT_COLUMNS:
+            data = array('i', (-1 if v is None else v for v in values))
+            with open(os.path.join(directory, f"{name}.i32"), 'wb') as f:
+                data.tofile(f)
+            described["columns"][name] = {"type": "int32", "file": f"{name}.i32", "null": -1}
+        else:
+            blob = bytearray()
+            offsets = array('I', [0])
+            nulls = []
+            for i, v in enumerate(values):
+                if v is None: nulls.append(i)
+                blob += (v or "").encode('utf-8')
+                offsets.append(len(blob))
+            with open(os.path.join(directory, f"{name}.offsets"), 'wb') as f:
+                offsets.tofile(f)
+            with open(os.path.join(directory, f"{name}.utf8"), 'wb') as f:
+                f.write(blob)
+            described["columns"][name] = {"type": "utf8", "file": f"{name}.utf8", "offsets": f"{name}.offsets",
+                                          "nulls": nulls}
+    with card_stream.atomic_write(os.path.join(directory, "columns.json")) as f:
+        json.dump(described, f, indent=2)
+
+class ColumnStore:
+    """Read-only, memory-mapped view of a columnar dump."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "columns.json"), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.count = self.meta["count"]
+        self.nulls = {name: set(col.get("nulls", ())) for name, col in self.meta["columns"].items()}
+        self.maps = {}
+
+    def _map(self, filename):
+        if filename not in self.maps:
+            with open(os.path.join(self.directory, filename), 'rb') as f:
+                self.maps[filename] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        return self.maps[filename]
+
+    def ints(self, name):
+        """memoryview of int32 values (-1 = null)."""
+        col = self.meta["columns"][name]
+        return memoryview(self._map(col["file"])).cast('i')
+
+    def string(self, name, i):
+        if i in self.nulls[name]: return None
+        col = self.meta["columns"][name]
+        offsets = memoryview(self._map(col["offsets"])).cast('I')
+        return bytes(self._map(col["file"])[offsets[i]:offsets[i + 1]]).decode('utf-8')
+
+    def strings(self, name):
+        return [self.string(name, i) for i in range(self.count)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exports cards.json / decks.json / the exburst feed into SQLite.")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--cards", default="cards.json")
+    parser.add_argument("--decks", default="decks.json")
+    parser.add_argument("--og", default=default_og_file(), help="og_main output (default: data.json or og_data.json)")
+    parser.add_argument("--columns", metavar="DIR", help="also write the column-oriented binary dump to DIR")
+    args = parser.parse_args()
+    export(args.db, args.cards, args.decks, args.og, args.columns)
+    print(f"💾 Exported to {args.db}")
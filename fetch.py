@@ -0,0 +1,106 @@
+"""
+Shared HTTP layer for the scraper.
+
+Every request goes through one pooled keep-alive session, so connections (and
+their TLS handshakes) are reused across pages. In-flight requests are capped,
+transient failures are retried with exponential backoff and each host gets an
+evenly spaced request rate. `gather` runs a batch of fetches concurrently so
+time spent waiting on the network overlaps instead of adding up.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+
+# --- CONFIGURATION ---
+MAX_IN_FLIGHT = int(os.getenv("SCRAPER_MAX_IN_FLIGHT", "16"))
+HOST_RATE_LIMIT = float(os.getenv("SCRAPER_RATE_LIMIT", "10"))  # requests/sec per host, 0 = unlimited
+RETRIES = 3
+BACKOFF = 0.5  # seconds, doubled on each retry
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+class HostRateLimiter:
+    """Hands out evenly spaced request slots per host, shared by all worker threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, url):
+        if not self.interval: return
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+RATE_LIMITER = HostRateLimiter(HOST_RATE_LIMIT)
+IN_FLIGHT = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+RECORDER = None  # set by replay.recording() to capture every exchange
+
+_session = None
+_session_lock = threading.Lock()
+
+def session():
+    """Returns the process-wide pooled session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRIES, backoff_factor=BACKOFF, status_forcelist=RETRY_STATUSES,
+                allowed_methods=["GET", "HEAD"], raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_IN_FLIGHT, max_retries=retry)
+            s = requests.Session()
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _session = s
+        return _session
+
+def retry_count(response):
+    """Retries urllib3 made before this response arrived."""
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+def request(method, url, params=None, headers=None, timeout=10, allow_redirects=True):
+    RATE_LIMITER.wait(url)
+    with IN_FLIGHT:
+        start = time.perf_counter()
+        try:
+            response = session().request(method, url, params=params, headers=headers, timeout=timeout,
+                                         allow_redirects=allow_redirects)
+        except Exception:
+            metrics.METRICS.record_request(time.perf_counter() - start)
+            raise
+        metrics.METRICS.record_request(time.perf_counter() - start, response, retry_count(response))
+        if RECORDER is not None:
+            RECORDER.record(method, response)
+        return response
+
+def get(url, params=None, headers=None, timeout=10):
+    return request("GET", url, params=params, headers=headers, timeout=timeout)
+
+def head(url, headers=None, timeout=5):
+    # Like requests.head: a missing image that redirects to a placeholder must not count as found
+    return request("HEAD", url, headers=headers, timeout=timeout, allow_redirects=False)
+
+def gather(fn, items, workers=None):
+    """Runs fn over items concurrently and returns the results in input order."""
+    items = list(items)
+    if not items: return []
+    workers = min(len(items), workers or MAX_IN_FLIGHT)
+    if workers <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
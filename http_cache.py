@@ -0,0 +1,196 @@
+"""
+Persistent HTTP cache for the scraper (SQLite, keyed by URL + params).
+
+Each entry keeps the response validators (ETag / Last-Modified), a hash of
+the body, the compressed body and the structured result parsed from it.
+`fetch_parsed` sends a conditional request and, on a 304 or an unchanged
+body hash, returns the stored parse result without touching the HTML again,
+so an unchanged card page costs one cheap revalidation.
+
+Entries unused for CACHE_TTL are evicted, then the least recently used ones
+until the file is under CACHE_MAX_BYTES.
+
+The same file remembers URLs that answered 404 to a HEAD probe (missing
+parallel art) for PROBE_TTL, so they are not probed again on every run.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlencode
+
+import fetch
+import metrics
+
+# --- CONFIGURATION ---
+CACHE_FILE = os.getenv("SCRAPER_HTTP_CACHE", ".http_cache.sqlite")  # "" disables the cache
+CACHE_TTL = 14 * 24 * 3600  # seconds since last use
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+PROBE_TTL = 7 * 24 * 3600  # how long a 404 probe result is trusted
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    body BLOB NOT NULL,
+    parser TEXT,
+    parsed TEXT,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+CREATE TABLE IF NOT EXISTS missing (
+    url TEXT PRIMARY KEY,
+    checked_at REAL NOT NULL
+);
+"""
+
+def cache_key(url, params=None):
+    return f"{url}?{urlencode(sorted((params or {}).items()))}"
+
+class HttpCache:
+    """Thread-safe wrapper around the SQLite cache file."""
+
+    def __init__(self, path, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES, probe_ttl=PROBE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.probe_ttl = probe_ttl
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT etag, last_modified, content_hash, body, parser, parsed FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if not row: return None
+        etag, last_modified, content_hash, body, parser, parsed = row
+        return {
+            "etag": etag, "last_modified": last_modified, "content_hash": content_hash,
+            "body": body, "parser": parser, "parsed": parsed,
+        }
+
+    def store(self, key, url, response, content_hash, parser, parsed):
+        body = zlib.compress(response.content)
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, response.headers.get("ETag"), response.headers.get("Last-Modified"), content_hash,
+                 body, parser, parsed, len(body) + len(parsed or ""), now, now),
+            )
+
+    def revalidated(self, key, response=None, parser=None, parsed=None):
+        """Marks an entry fresh; optionally refreshes validators and the parse result."""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute("UPDATE responses SET accessed_at = ?, fetched_at = ? WHERE key = ?", (now, now, key))
+            if response is not None:
+                self.db.execute(
+                    "UPDATE responses SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                    (response.headers.get("ETag"), response.headers.get("Last-Modified"), key),
+                )
+            if parsed is not None:
+                self.db.execute("UPDATE responses SET parser = ?, parsed = ? WHERE key = ?", (parser, parsed, key))
+
+    def known_missing(self, urls):
+        """Subset of urls recorded as 404 within the probe TTL."""
+        cutoff = time.time() - self.probe_ttl
+        urls = list(urls)
+        found = set()
+        with self.lock:
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows = self.db.execute(
+                    f"SELECT url FROM missing WHERE checked_at >= ? AND url IN ({','.join('?' * len(chunk))})",
+                    [cutoff] + chunk,
+                ).fetchall()
+                found.update(url for url, in rows)
+        return found
+
+    def record_missing(self, urls):
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO missing VALUES (?, ?)", [(url, now) for url in urls])
+
+    def evict(self):
+        """Drops entries unused for the TTL, then LRU entries until under the size cap."""
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM missing WHERE checked_at < ?", (time.time() - self.probe_ttl,))
+            self.db.execute("DELETE FROM responses WHERE accessed_at < ?", (time.time() - self.ttl,))
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self.db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+                doomed = []
+                for key, size in rows:
+                    if total <= self.max_bytes: break
+                    doomed.append((key,))
+                    total -= size
+                self.db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        with self.lock:
+            self.db.execute("VACUUM")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Returns the shared cache, or None when caching is disabled."""
+    global _cache
+    if not CACHE_FILE: return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache(CACHE_FILE)
+        return _cache
+
+def fetch_parsed(url, params, parse, parser="", headers=None, timeout=10):
+    """
+    GETs url and returns parse(content), reusing the cached parse result when
+    the server answers 304 or the body hash is unchanged. `parser` tags the
+    stored result so a change in parsing logic forces a re-parse.
+    """
+    cache = get_cache()
+    if cache is None:
+        return parse(fetch.get(url, params=params, headers=headers, timeout=timeout).content)
+
+    key = cache_key(url, params)
+    entry = cache.get(key)
+    request_headers = dict(headers or {})
+    if entry:
+        if entry["etag"]: request_headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]: request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = fetch.get(url, params=params, headers=request_headers, timeout=timeout)
+
+    if response.status_code == 304 and entry:
+        metrics.count("cache.not_modified")
+        if entry["parser"] == parser and entry["parsed"] is not None:
+            cache.revalidated(key)
+            return json.loads(entry["parsed"])
+        result = parse(zlib.decompress(entry["body"]))
+        cache.revalidated(key, parser=parser, parsed=json.dumps(result))
+        return result
+
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    if entry and entry["content_hash"] == content_hash and entry["parser"] == parser and entry["parsed"] is not None:
+        metrics.count("cache.unchanged_body")
+        cache.revalidated(key, response)
+        return json.loads(entry["parsed"])
+
+    metrics.count("cache.parsed")
+    result = parse(response.content)
+    if response.status_code == 200:
+        cache.store(key, url, response, content_hash, parser, json.dumps(result))
+    return result
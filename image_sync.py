@@ -0,0 +1,119 @@
+"""
+Image sync pipeline for og_main: source image host -> Cloudinary.
+
+Images are downloaded straight into memory (no temp files) with a
+conditional GET, hashed, and uploaded only when the content hash differs
+from the one recorded in the local manifest:
+
+    image_manifest.json   {card_id: {"hash", "secure_url", "source_url", "etag", "last_modified"}}
+
+An unchanged image therefore costs one revalidation (or one download when the
+host has no validators) and no upload. Uploads run on a bounded thread pool.
+The uploader is injectable, so the pipeline can run against a local stand-in
+instead of Cloudinary (test_image_sync.py does, with bench.StubImageCDN).
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cloudinary.uploader
+
+import card_stream
+
+# --- CONFIGURATION ---
+IMAGE_MANIFEST_FILE = "image_manifest.json"
+UPLOAD_WORKERS = int(os.getenv("IMAGE_UPLOAD_WORKERS", "8"))
+PUBLIC_ID_PREFIX = "gundam_cards/"
+
+def cloudinary_upload(data, card_id):
+    result = cloudinary.uploader.upload(
+        io.BytesIO(data),
+        public_id=f"{PUBLIC_ID_PREFIX}{card_id}",
+        unique_filename=False,
+        overwrite=True,
+        invalidate=True,
+    )
+    return result['secure_url']
+
+class ImageSync:
+    """Syncs (card_id, image_url) pairs to the image CDN, skipping unchanged content."""
+
+    def __init__(self, session, upload=cloudinary_upload, manifest_path=IMAGE_MANIFEST_FILE, workers=UPLOAD_WORKERS):
+        self.session = session
+        self.upload = upload
+        self.manifest_path = manifest_path
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.manifest = self.load_manifest()
+        self.stats = {"uploaded": 0, "unchanged": 0, "failed": 0}
+
+    def load_manifest(self):
+        if self.manifest_path and os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception:
+                pass
+        return {}
+
+    def save_manifest(self):
+        if not self.manifest_path: return
+        with self.lock, card_stream.atomic_write(self.manifest_path) as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def sync_one(self, card_id, image_url):
+        """Returns the CDN secure_url for card_id, uploading only if the image changed."""
+        if not image_url:
+            self._count("failed")
+            return None
+        with self.lock:
+            entry = self.manifest.get(card_id)
+        try:
+            headers = {}
+            if entry and entry.get('source_url') == image_url:
+                if entry.get('etag'): headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'): headers['If-Modified-Since'] = entry['last_modified']
+
+            with self.session.get(image_url, headers=headers, stream=True, timeout=30) as r:
+                if r.status_code == 304 and entry:
+                    self._count("unchanged")
+                    return entry['secure_url']
+                r.raise_for_status()
+                buf = io.BytesIO()
+                for chunk in r.iter_content(64 * 1024):
+                    buf.write(chunk)
+                validators = {'etag': r.headers.get('ETag'), 'last_modified': r.headers.get('Last-Modified')}
+
+            data = buf.getvalue()
+            digest = hashlib.sha256(data).hexdigest()
+            if entry and entry.get('hash') == digest:
+                secure_url = entry['secure_url']
+                self._count("unchanged")
+            else:
+                print(f"Uploading image for {card_id}...")
+                secure_url = self.upload(data, card_id)
+                self._count("uploaded")
+
+            with self.lock:
+                self.manifest[card_id] = {"hash": digest, "secure_url": secure_url, "source_url": image_url, **validators}
+            return secure_url
+        except Exception as e:
+            print(f"Failed to upload image for {card_id}: {e}")
+            self._count("failed")
+            return None
+
+    def sync(self, jobs):
+        """Syncs [(card_id, image_url)] concurrently; returns {card_id: secure_url or None}."""
+        jobs = list(jobs)
+        if not jobs: return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(jobs)))) as pool:
+            urls = list(pool.map(lambda job: self.sync_one(*job), jobs))
+        self.save_manifest()
+        return {card_id: url for (card_id, _), url in zip(jobs, urls)}
@@ -1,9 +1,22 @@
-import requests  
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import argparse
+import hashlib
 import json
 import re
-import time
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import card_lookup
+import card_stream
+import checkpoint
+import compact_store
+import export_db
+import fetch
+import http_cache
+import metrics
+import normalize
+import reconcile
+import search_index
 
 # --- CONFIGURATION ---
 BASE_URL = "https://www.gundam-gcg.com/en/cards/index.php"
@@ -13,8 +26,25 @@ HOST = "https://www.gundam-gcg.com"
 
 # OUTPUT FILES
 CARDS_FILE = "cards.json"
+CARDS_NDJSON_FILE = "cards.ndjson"
+CARDS_COMPACT_FILE = "cards.compact.json"
+SEARCH_INDEX_FILE = "search_index.json"
+SQLITE_FILE = export_db.DB_FILE
+LOOKUP_RECORDS_FILE = card_lookup.RECORDS_FILE
+LOOKUP_INDEX_FILE = card_lookup.INDEX_FILE
+RECONCILE_FILE = reconcile.REPORT_FILE
 DECKS_FILE = "decks.json"
 CONFIG_FILE = "set_config.json"
+BOUNDARIES_FILE = "set_boundaries.json"  # each set's last card number, where the next brute-force crawl starts
+MANIFEST_FILE = "crawl_manifest.json"
+SHARD_DIR = "shards"  # per-set output of --workers / --sets runs
+JOURNAL = None  # checkpoint.Journal of the running crawl
+TRUSTED = set()  # card numbers whose last scrape the exburst feed agrees with (--feed)
+
+# CONCURRENCY
+# Cards are enriched by a worker pool; connection pooling, retries and the
+# per-host rate limit live in fetch.py.
+MAX_WORKERS = int(os.getenv("SCRAPER_WORKERS", "8"))
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -79,10 +109,65 @@ DEFAULT_SETS = [
     {"id": "RP", "name": "Resource Promos", "type": "flat", "internal_id": ""}
 ]
 
-def get_soup(url, params=None):
+# Missing card numbers after a remembered last card before it still counts as the end
+BOUNDARY_SLACK = 2
+# Past that, every SPARSE_STEP-th number up to the limit is probed too, so a
+# longer gap (a card pulled from a set, a range reserved for promos) doesn't
+# end the set early: any later run of at least SPARSE_STEP cards is found.
+SPARSE_STEP = BOUNDARY_SLACK + 1
+
+# Bump when parse_details changes so cached parse results are rebuilt
+DETAILS_PARSER = "details-v2"
+
+# --- HTML PARSING ---
+# lxml is several times faster than the stdlib parser; SCRAPER_HTML_PARSER
+# picks any BeautifulSoup tree builder explicitly ("html.parser", "lxml", "html5lib").
+def default_html_parser():
     try:
-        response = requests.get(url, params=params, headers=HEADERS, timeout=10)
-        return BeautifulSoup(response.content, 'html.parser')
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+HTML_PARSER = os.getenv("SCRAPER_HTML_PARSER") or default_html_parser()
+
+CARD_DATA_CLASSES = {"cardName", "rarity", "cardDataRow"}
+
+def is_card_data(name, attrs):
+    if name == "dl": return True
+    classes = attrs.get("class") or []
+    if isinstance(classes, str): classes = classes.split()
+    return not CARD_DATA_CLASSES.isdisjoint(classes)
+
+class CardDataStrainer(SoupStrainer):
+    """
+    Builds only the parts of a detail page parse_details reads: every <dl>
+    (stats + FAQ) and the cardName / rarity / cardDataRow blocks, each with
+    its full subtree. Navigation, scripts and footers are never turned into
+    tree nodes.
+    """
+
+    # bs4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return is_card_data(name, attrs or {})
+
+    def allow_string_creation(self, string):
+        return False
+
+    # bs4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return markup_name if is_card_data(markup_name, dict(markup_attrs or {})) else None
+
+DETAIL_STRAINER = CardDataStrainer()
+
+def make_soup(content, parse_only=None):
+    return BeautifulSoup(content, HTML_PARSER, parse_only=parse_only)
+
+@metrics.timed("get_soup")
+def get_soup(url, params=None, parse_only=None):
+    try:
+        response = fetch.get(url, params=params, headers=HEADERS, timeout=10)
+        return make_soup(response.content, parse_only)
     except Exception as e: 
         print(f"Error fetching {url}: {e}")
         return None
@@ -93,12 +178,30 @@ def load_known_sets():
             with open(CONFIG_FILE, 'r') as f:
                 return json.load(f)
         except: pass
-    return DEFAULT_SETS
+    return [dict(s) for s in DEFAULT_SETS]
 
 def save_known_sets(sets):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(sets, f, indent=2)
+    # Boundaries live in BOUNDARIES_FILE, so set_config.json stays plain set metadata
+    with card_stream.atomic_write(CONFIG_FILE) as f:
+        json.dump([{k: v for k, v in s.items() if k != 'last_card'} for s in sets], f, indent=2)
+
+def load_boundaries():
+    if os.path.exists(BOUNDARIES_FILE):
+        try:
+            with open(BOUNDARIES_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except: pass
+    return {}
 
+def save_boundaries(sets):
+    with card_stream.atomic_write(BOUNDARIES_FILE) as f:
+        json.dump({s['id']: s['last_card'] for s in sets if s.get('last_card')}, f, indent=2)
+
+def card_exists(card_id):
+    soup = get_soup(DETAIL_URL, {'detailSearch': card_id}, DETAIL_STRAINER)
+    return bool(soup and soup.select_one('.cardName'))
+
+@metrics.timed("discovery")
 def hunt_for_new_sets(current_sets):
     print("🔮 Hunting for future sets (ST, GD)...")
     max_counts = {"ST": 0, "GD": 0}
@@ -109,43 +212,59 @@ def hunt_for_new_sets(current_sets):
             if prefix in max_counts:
                 max_counts[prefix] = max(max_counts[prefix], int(num))
     
+    # Probe the next 3 set codes of every prefix in one concurrent batch
+    candidates = [
+        f"{prefix}{current_max + i:02d}"
+        for prefix, current_max in max_counts.items() for i in range(1, 4)
+    ]
+    found = dict(zip(candidates, fetch.gather(lambda code: card_exists(f"{code}-001"), candidates)))
+
     new_found = []
     for prefix, current_max in max_counts.items():
-        check_num = current_max + 1
-        for i in range(3): 
-            set_code = f"{prefix}{check_num:02d}"
-            card_id = f"{set_code}-001"
-            print(f"   ❓ Probing {set_code} ({card_id})...", end="")
-            
-            soup = get_soup(DETAIL_URL, {'detailSearch': card_id})
-            if soup and soup.select_one('.cardName'):
+        for i in range(1, 4):
+            set_code = f"{prefix}{current_max + i:02d}"
+            print(f"   ❓ Probing {set_code} ({set_code}-001)...", end="")
+            if found[set_code]:
                 print(f" ✅ FOUND!")
                 new_entry = {"id": set_code, "name": f"Set {set_code}", "type": "seq", "internal_id": ""}
                 current_sets.append(new_entry)
                 new_found.append(new_entry)
             else:
                 print(" ❌")
-                break 
-            check_num += 1
-            time.sleep(0.3)
+                break
 
     if new_found: save_known_sets(current_sets)
     return current_sets
 
 def extract_rarities(rarity_text):
     """Splits rarity string into a clean list."""
-    if not rarity_text: return ["-"]
-    parts = re.split(r'[・/,\.\|\u30FB]', rarity_text) 
-    return [p.strip() for p in parts if p.strip()]
+    return list(normalize.split_rarities(rarity_text))
 
+@metrics.timed("detail")
 def scrape_details(card_id):
     """
     Fetches stats with smart Key Mapping and FAQ extraction.
+    Unchanged pages are served from the HTTP cache's stored parse result.
+    """
+    def parse(content):
+        details = parse_details(make_soup(content, DETAIL_STRAINER))
+        details['parallels'] = listed_parallels(content, card_id)
+        return details
+
+    try:
+        return http_cache.fetch_parsed(
+            DETAIL_URL, {'detailSearch': card_id}, parse,
+            parser=DETAILS_PARSER, headers=HEADERS,
+        )
+    except Exception as e:
+        print(f"Error fetching {DETAIL_URL}: {e}")
+        return {}
+
+def parse_details(soup):
+    """
+    Extracts stats, rarity, effect text and FAQ from a detail page.
     Matches the logic used in the successful JS console test.
     """
-    soup = get_soup(DETAIL_URL, {'detailSearch': card_id})
-    if not soup: return {}
-    
     stats = {}
     faq_list = []
     
@@ -209,39 +328,201 @@ def scrape_details(card_id):
 
     return stats
 
-def find_parallels(base_card_id, base_data):
+# --- PARALLELS ---
+# Parallel art lives at {card_no}_p1.webp .. _p4.webp. Numbers referenced by
+# the detail page are used directly; anything else is HEAD-probed per set in
+# two concurrent waves, with confirmed misses remembered by the HTTP cache.
+PARALLEL_REF = re.compile(rb'([A-Z]+\d*-\d+)_p(\d+)\.webp')
+MAX_PARALLELS = 4
+
+def listed_parallels(content, card_no):
+    """Parallel numbers a detail page links to for this card (sorted)."""
+    key = card_no.encode('utf-8')
+    return sorted({int(p) for no, p in PARALLEL_REF.findall(content) if no == key})
+
+def parallel_url(card_no, p):
+    return f"{IMAGE_BASE}{card_no}_p{p}.webp"
+
+def image_status(image_url):
+    try:
+        return fetch.head(image_url, headers=HEADERS, timeout=5).status_code
+    except Exception:
+        return None
+
+def probe_images(urls):
+    """HEADs urls as one concurrent batch, skipping known misses. Returns {url: exists}."""
+    cache = http_cache.get_cache()
+    known_missing = cache.known_missing(urls) if cache else set()
+    todo = [u for u in urls if u not in known_missing]
+    metrics.count("probe.skipped_known_missing", len(urls) - len(todo))
+    statuses = dict(zip(todo, fetch.gather(image_status, todo)))
+    if cache:
+        cache.record_missing([u for u, status in statuses.items() if status == 404])
+    return {u: statuses.get(u) == 200 for u in urls}
+
+def contiguous_count(numbers):
+    n = 0
+    while n + 1 in numbers:
+        n += 1
+    return n
+
+@metrics.timed("parallel_probe")
+def discover_parallels(cards):
+    """Number of parallels (_p1.._pN, contiguous) for every card of a set."""
+    counts = {}
+    pending = []
+    for c in cards:
+        listed = c.get('details', {}).get('parallels')
+        if listed:
+            counts[c['card_no']] = contiguous_count(set(listed))
+        else:
+            pending.append(c['card_no'])
+
+    # Wave 1: _p1 of every card (most have none); wave 2: _p2.._p4 of the rest
+    first = probe_images([parallel_url(no, 1) for no in pending])
+    with_p1 = [no for no in pending if first[parallel_url(no, 1)]]
+    rest = probe_images([parallel_url(no, p) for no in with_p1 for p in range(2, MAX_PARALLELS + 1)])
+
+    for no in pending:
+        found = {p for p in range(1, MAX_PARALLELS + 1) if first.get(parallel_url(no, p)) or rest.get(parallel_url(no, p))}
+        counts[no] = contiguous_count(found)
+    return counts
+
+@metrics.timed("find_parallels")
+def find_parallels(base_card_id, base_data, count):
     variants = []
     rarity_list = base_data.get('details', {}).get('rarity_list', [])
-    
-    for p in range(1, 5):
+
+    for p in range(1, count + 1):
         variant_id = f"{base_data['card_no']}_p{p}"
-        image_name = f"{base_data['card_no']}_p{p}.webp"
-        image_url = f"{IMAGE_BASE}{image_name}"
         
         try:
-            resp = requests.head(image_url, headers=HEADERS, timeout=5)
-            if resp.status_code == 200:
-                print(f"      ✨ Found Parallel: {variant_id}")
-                var_data = base_data.copy()
-                var_data['id'] = variant_id
-                var_data['image_url'] = image_url
-                
-                if p < len(rarity_list):
-                    var_data['rarity'] = rarity_list[p]
-                else:
-                    var_data['rarity'] = f"{rarity_list[-1]} (Alt)"
-                    
-                variants.append(var_data)
+            print(f"      ✨ Found Parallel: {variant_id}")
+            var_data = base_data.copy()
+            var_data['id'] = variant_id
+            var_data['image_url'] = parallel_url(base_data['card_no'], p)
+            
+            if p < len(rarity_list):
+                var_data['rarity'] = rarity_list[p]
             else:
-                break
+                var_data['rarity'] = f"{rarity_list[-1]} (Alt)"
+                
+            variants.append(var_data)
         except: break
     return variants
 
-def process_set(set_meta):
+def card_quantity(set_id, card_no, card_type, rarity):
+    """Copies of a card in its starter deck (or a full playset)."""
+    qty = 4
+    if "LEADER" in card_type or "TOKEN" in card_type:
+        qty = 1
+    elif set_id in STARTER_COUNTS and card_no in STARTER_COUNTS[set_id]:
+        qty = STARTER_COUNTS[set_id][card_no]
+    elif set_id.startswith("ST") and set_id not in STARTER_COUNTS:
+        if normalize.rarity_tier(rarity) in ('SR', 'R'):
+            qty = 2
+    return qty
+
+def enrich_card(c, set_id):
+    """Scrapes details for one list-view card."""
+    details = scrape_details(c['card_no'])
+    c['details'] = details
+    c['rarity'] = details.get('rarity', 'C').strip()
+    c['type'] = details.get("type", "UNIT").strip().upper()
+    c['quantity'] = card_quantity(set_id, c['card_no'], c['type'], c['rarity'])
+    return c
+
+# Keys parse_details sets on any page, an error page included
+PAGE_DEFAULT_KEYS = {'rarity', 'rarity_list', 'text', 'faq', 'parallels'}
+
+def details_failed(details):
+    """True when a card's detail page yielded no card data (fetch error, or a page without stats or rarity)."""
+    return not (set(details or {}) - PAGE_DEFAULT_KEYS)
+
+def detail_card(card_id):
+    """card_no, name and image_url from a card's detail page, or None if there is no such card."""
+    try:
+        soup = get_soup(DETAIL_URL, {'detailSearch': card_id}, DETAIL_STRAINER)
+        if soup and soup.select_one('.cardName'):
+            nm = soup.select_one('.cardName').get_text(strip=True)
+            
+            # --- FIX: Construct URL manually ---
+            img = f"{IMAGE_BASE}{card_id}.webp"
+            
+            return {"card_no": card_id, "name": nm, "image_url": img}
+    except: pass
+    return None
+
+def card_number(card_no):
+    """'GD01-042' -> 42 (None if the card number has no numeric suffix)."""
+    match = re.search(r'-(\d+)$', card_no)
+    return int(match.group(1)) if match else None
+
+def find_last_card(probe, known=0, limit=120):
+    """
+    Highest card number of a set (0 if it has none). probe(i) returns the
+    card or None. Without a boundary remembered in set_boundaries.json (or when
+    that card is gone) every number up to limit is probed as one concurrent
+    batch, so a card on its own past a gap in sparse numbering is still
+    found. A remembered boundary is revalidated by a galloping search from
+    it, so an unchanged set costs only the probes at and just past it: the
+    end is bracketed by doubling steps and narrowed by bisection, and only
+    counts once the BOUNDARY_SLACK numbers past it are missing too and a
+    sparse probe (every SPARSE_STEP-th number up to limit, as one batch)
+    finds nothing further on.
+    Returns (last, {number: probe result}); every number is probed at most once.
+    """
+    found = {}
+
+    def exists(numbers):
+        todo = [i for i in numbers if i not in found and 1 <= i <= limit]
+        found.update(zip(todo, fetch.gather(probe, todo)))
+        return [i for i in numbers if found.get(i)]
+
+    if 0 < known <= limit:
+        exists(range(known, known + BOUNDARY_SLACK + 1))
+    if not found.get(known):
+        numbers = exists(range(1, limit + 1))
+        return max(numbers, default=0), found
+
+    lo = known
+    while True:
+        # Gallop: lo exists, find the first missing number past it
+        step = 1
+        while lo + step <= limit and exists([lo + step]):
+            lo += step
+            step *= 2
+        hi = min(lo + step, limit + 1)
+
+        # Bisect (lo exists, hi is missing or past the limit)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if exists([mid]):
+                lo = mid
+            else:
+                hi = mid
+
+        beyond = exists(range(lo + 1, lo + BOUNDARY_SLACK + 1))
+        if not beyond:
+            beyond = exists(range(lo + BOUNDARY_SLACK + 1, limit + 1, SPARSE_STEP))
+            if not beyond:
+                return lo, found
+        lo = max(beyond)
+
+@metrics.timed("list_view")
+def list_set_cards(set_meta):
+    """
+    List-view (or brute-forced) cards of a set: card_no, name and image_url only.
+    The highest card number seen is kept in set_meta['last_card'].
+    """
     set_id = set_meta['id']
-    print(f"\n📥 Processing {set_id} ({set_meta['name']})...")
-    
     cards = []
+
+    if JOURNAL and set_id in JOURNAL.listings:
+        entry = JOURNAL.listings[set_id]
+        print(f"   ♻️ Listing of {len(entry['cards'])} cards from the journal")
+        if entry['last_card']: set_meta['last_card'] = entry['last_card']
+        return [dict(c) for c in entry['cards']]
     
     # 1. Try List View first
     if set_meta.get('internal_id'):
@@ -260,135 +541,447 @@ def process_set(set_meta):
                     cards.append({"card_no": no, "name": nm, "image_url": img})
                 except: continue
 
-    # 2. Brute Force Fallback
+    # 2. Brute Force Fallback (the last card, revalidated from set_boundaries.json when known, then one concurrent batch)
     if not cards:
         print(f"   ⚠️ List view failed. Brute-forcing...")
         limit = 30 if set_id.startswith("ST") else 120
-        for i in range(1, limit + 1):
-            try:
-                card_id = f"{set_id}-{i:03d}"
-                soup = get_soup(DETAIL_URL, {'detailSearch': card_id})
-                if soup and soup.select_one('.cardName'):
-                    nm = soup.select_one('.cardName').get_text(strip=True)
-                    
-                    # --- FIX: Construct URL manually ---
-                    img = f"{IMAGE_BASE}{card_id}.webp"
-                    
-                    cards.append({"card_no": card_id, "name": nm, "image_url": img})
-                time.sleep(0.1)
-            except: continue
+        last, found = find_last_card(lambda i: detail_card(f"{set_id}-{i:03d}"), set_meta.get('last_card', 0), limit)
+        rest = [i for i in range(1, last + 1) if i not in found]
+        found.update(zip(rest, fetch.gather(lambda i: detail_card(f"{set_id}-{i:03d}"), rest)))
+        cards = [found[i] for i in range(1, last + 1) if found[i]]
 
-    # 3. Enrich Data
+    numbers = [card_number(c['card_no']) for c in cards]
+    if any(numbers):
+        set_meta['last_card'] = max(n for n in numbers if n)
+
+    if JOURNAL and cards:
+        JOURNAL.listing_done(set_id, cards, set_meta.get('last_card'))
+    return cards
+
+@metrics.timed("enrich")
+def enrich_cards(cards, set_id):
+    """Enriches list-view cards concurrently, merged back in list order with their parallels."""
     final_cards = []
-    print(f"   🔍 Enriching {len(cards)} cards...")
-    
-    for c in cards:
-        details = scrape_details(c['card_no'])
-        c['details'] = details
-        c['rarity'] = details.get('rarity', 'C').strip()
-        c['type'] = details.get("type", "UNIT").strip().upper()
+    print(f"   🔍 Enriching {len(cards)} cards ({MAX_WORKERS} workers)...")
+
+    done = JOURNAL.cards.get(set_id, {}) if JOURNAL else {}
+    if done:
+        print(f"   ♻️ {sum(c['card_no'] in done for c in cards)} cards already enriched (journal)")
+
+    def enrich(c):
+        if c['card_no'] in done: return done[c['card_no']]
+        c = enrich_card(c, set_id)
+        # Cards whose detail page failed are not checkpointed, so --resume retries them
+        if JOURNAL and not details_failed(c['details']):
+            JOURNAL.card_done(set_id, c)
+        return c
+
+    with ThreadPoolExecutor(max_workers=max(1, MAX_WORKERS)) as pool:
+        enriched = list(pool.map(enrich, cards))
+
+    parallel_counts = JOURNAL.parallels.get(set_id) if JOURNAL else None
+    if not parallel_counts or any(c['card_no'] not in parallel_counts for c in enriched):
+        parallel_counts = discover_parallels(enriched)
+        if JOURNAL:
+            JOURNAL.parallels_done(set_id, parallel_counts)
+    if JOURNAL:
+        JOURNAL.cards_enriched(set_id, [c['card_no'] for c in enriched])
+    for c in enriched:
+        final_cards.append(c)
+        final_cards.extend(find_parallels(c['card_no'], c, parallel_counts[c['card_no']]))
+
+    return final_cards
+
+def build_card_record(c, set_id, fields=None):
+    """
+    Maps an enriched card (or parallel) to its cards.json record. fields are
+    its normalised detail fields (normalize.DETAIL_FIELDS), when already
+    converted as part of a batch.
+    """
+    uid = c.get('id', c['card_no'])
+    d = c.get('details', {})
+    f = fields if fields is not None else normalize.normalise_details(d)
+
+    # --- FINAL JSON MAPPING ---
+    return {
+        "id": uid, 
+        "card_no": c['card_no'], 
+        "name": c['name'], 
+        "image_url": c['image_url'],
         
-        # Quantity Logic
-        qty = 4 
-        if "LEADER" in c['type'] or "TOKEN" in c['type']: 
-            qty = 1
-        elif set_id in STARTER_COUNTS and c['card_no'] in STARTER_COUNTS[set_id]:
-            qty = STARTER_COUNTS[set_id][c['card_no']]
-        elif set_id.startswith("ST") and set_id not in STARTER_COUNTS:
-            rarity_clean = c['rarity'].replace('+', '').upper()
-            if rarity_clean in ['SR', 'R']:
-                qty = 2
+        # Integers (will be null for Tokens/Events)
+        "cost": f['cost'],
+        "hp": f['hp'],
+        "ap": f['ap'],
+        "level": f['level'],
         
-        c['quantity'] = qty
-        final_cards.append(c)
+        # Strings (will be null if "-")
+        "color": f['color'],
+        "type": c['type'],
+        "rarity": c['rarity'],
+        "trait": f['trait'],
+        "link": f['link'],  # <--- NEW FIELD ADDED HERE
+        "effect_text": f['effect_text'],
         
-        # Parallels
-        vars = find_parallels(c['card_no'], c)
-        final_cards.extend(vars)
-        time.sleep(0.1) 
+        # Extended Fields
+        "zone": f['zone'],
+        "source": f['source'],
+        "product": f['product'],
+        "faq": d.get('faq', []), # Keep empty array if no FAQ
+        
+        "set": set_id
+    }
 
-    return final_cards
+def build_card_records(cards, set_id):
+    """cards.json records for a batch of enriched cards, normalised together."""
+    rows = normalize.normalise_batch([c.get('details', {}) for c in cards])
+    return [build_card_record(c, set_id, f) for c, f in zip(cards, rows)]
+
+def build_deck(set_meta, records):
+    """Starter deck object from a set's card records (parallels excluded)."""
+    base_cards = [r for r in records if "_p" not in r['id']]
+    return {
+        "name": set_meta['name'],
+        "cards": [
+            {"card_no": r['card_no'], "quantity": card_quantity(set_meta['id'], r['card_no'], r['type'], r['rarity'])}
+            for r in base_cards
+        ]
+    }
 
-def main():
+# --- DELTA MODE ---
+# The manifest remembers each set's list-view fingerprint so --incremental
+# runs only re-enrich cards that are new or whose list entry changed.
+
+def card_fingerprint(c):
+    return hashlib.sha1(json.dumps([c['card_no'], c['name'], c['image_url']]).encode('utf-8')).hexdigest()
+
+def set_fingerprint(fingerprints):
+    return hashlib.sha1(json.dumps(fingerprints).encode('utf-8')).hexdigest()
+
+def load_manifest():
+    if os.path.exists(MANIFEST_FILE):
+        try:
+            with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except: pass
+    return {}
+
+def save_manifest(manifest):
+    with card_stream.atomic_write(MANIFEST_FILE) as f:
+        json.dump(manifest, f, indent=2)
+
+def load_existing_records(cards_file):
+    """Current card file grouped as {set: {card_no: [base, *parallels]}}, in file order."""
+    by_set = {}
+    if os.path.exists(cards_file):
+        try:
+            for r in card_stream.iter_cards(cards_file):
+                by_set.setdefault(r['set'], {}).setdefault(r['card_no'], []).append(r)
+        except: pass
+    return by_set
+
+@metrics.timed("crawl_set")
+def crawl_set(s, manifest, existing, incremental):
+    """Returns the set's card records, re-enriching only what the delta requires."""
+    set_id = s['id']
+    print(f"\n📥 Processing {set_id} ({s['name']})...")
+    listed = list_set_cards(s)
+    old = existing.get(set_id, {})
+
+    if not listed:
+        if incremental and old:
+            print(f"   ⚠️ Listing empty, carrying forward {len(old)} cards")
+            return [r for group in old.values() for r in group]
+        return []
+
+    fingerprints = {c['card_no']: card_fingerprint(c) for c in listed}
+    set_hash = set_fingerprint([fingerprints[c['card_no']] for c in listed])
+    prev = manifest.get(set_id, {})
+    manifest[set_id] = {"hash": set_hash, "cards": fingerprints}
+
+    if incremental and prev.get('hash') == set_hash and all(c['card_no'] in old for c in listed):
+        print(f"   ✅ Unchanged, carrying forward {len(listed)} cards")
+        return [r for no in dict.fromkeys(fingerprints) for r in old[no]]
+
+    if incremental:
+        todo = [c for c in listed if c['card_no'] not in old or prev.get('cards', {}).get(c['card_no']) != fingerprints[c['card_no']]]
+    else:
+        todo = listed
+
+    if TRUSTED:
+        # The feed vouches for these: keep the previous records instead of refetching their detail pages
+        # (cards the journal already enriched are reused as they are)
+        agreed = {c['card_no'] for c in todo if c['card_no'] in TRUSTED and c['card_no'] in old
+                  and old[c['card_no']][0]['name'] == c['name'] and not (JOURNAL and JOURNAL.has_card(set_id, c['card_no']))}
+        if agreed:
+            print(f"   🤝 {len(agreed)} cards agree with the feed, carrying them forward")
+            metrics.count("reconcile.detail_skipped", len(agreed))
+            todo = [c for c in todo if c['card_no'] not in agreed]
+
+    enriched = enrich_cards(todo, set_id)
+    failed = {c['card_no'] for c in enriched if details_failed(c['details'])}
+    if failed:
+        # Left out of the manifest, so the next --incremental run retries them
+        print(f"   ⚠️ {len(failed)} detail pages failed, retrying them next run")
+        kept = {no: fp for no, fp in fingerprints.items() if no not in failed}
+        manifest[set_id] = {"hash": set_fingerprint(list(kept.values())), "cards": kept}
+
+    fresh = {}
+    for r in build_card_records(enriched, set_id):
+        fresh.setdefault(r['card_no'], []).append(r)
+
+    return [r for no in dict.fromkeys(fingerprints) for r in fresh.get(no) or old[no]]
+
+# --- SHARDED CRAWL (one process per set) ---
+
+def shard_path(set_id):
+    return os.path.join(SHARD_DIR, f"{set_id}.json")
+
+def init_worker(rate, journal_path, resume, trusted):
+    """Worker processes need their own session, cache connection and journal, and share the host rate."""
+    global JOURNAL, TRUSTED
+    fetch._session = None
+    http_cache._cache = None
+    fetch.RATE_LIMITER = fetch.HostRateLimiter(rate)
+    metrics.METRICS.reset()
+    JOURNAL = checkpoint.Journal(journal_path, resume, truncate=False) if journal_path else None
+    TRUSTED = trusted
+
+def crawl_shard(s, manifest_entry, old_records, incremental):
+    """
+    Crawls one set (in a worker process) and writes its shard: the set, its
+    manifest entry and records. Returns what the crawl added to the metrics.
+    """
+    manifest = {s['id']: manifest_entry} if manifest_entry else {}
+    existing = {s['id']: old_records} if old_records else {}
+    before = metrics.METRICS.snapshot()
+    records = crawl_set(s, manifest, existing, incremental)
+    after = metrics.METRICS.snapshot()
+    shard = {"set": s, "manifest": manifest.get(s['id']), "records": records}
+
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    with card_stream.atomic_write(shard_path(s['id'])) as f:
+        json.dump(shard, f)
+    if JOURNAL:
+        JOURNAL.set_done(s, manifest.get(s['id']), records)
+    return metrics_delta(before, after)
+
+def metrics_delta(before, after):
+    """What a crawl added to a metrics snapshot (workers are reused across sets)."""
+    return {
+        "stages": {k: v[len(before["stages"].get(k, [])):] for k, v in after["stages"].items()},
+        "counters": {k: v - before["counters"].get(k, 0) for k, v in after["counters"].items()},
+        "statuses": {k: v - before["statuses"].get(k, 0) for k, v in after["statuses"].items()},
+        "latencies": after["latencies"][len(before["latencies"]):],
+        **{k: after[k] - before[k] for k in ("bytes", "errors", "retries")},
+    }
+
+def crawl_sharded(sets, manifest, existing, incremental, workers):
+    """
+    Crawls sets on a process pool, one shard file each. A set that fails is
+    retried once in this process; if it fails again the run stops, and the
+    shards already written stay for a later --sets run.
+    """
+    rate = 1 / fetch.RATE_LIMITER.interval if fetch.RATE_LIMITER.interval else 0
+    print(f"\n🧩 Crawling {len(sets)} sets on {workers} processes...")
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(rate / workers, JOURNAL.path if JOURNAL else None,
+                                       bool(JOURNAL and JOURNAL.resume), TRUSTED)) as pool:
+        jobs = [(s, pool.submit(crawl_shard, s, manifest.get(s['id']), existing.get(s['id']), incremental)) for s in sets]
+        for s, job in jobs:
+            try:
+                metrics.METRICS.merge(job.result())
+            except Exception as e:
+                print(f"   ❌ {s['id']} failed: {e}")
+                failed.append(s)
+
+    for s in failed:
+        print(f"   🔁 Retrying {s['id']}...")
+        crawl_shard(s, manifest.get(s['id']), existing.get(s['id']), incremental)
+
+def load_shard(s, manifest):
+    """A set's shard records; its manifest entry and boundary are folded back in."""
+    path = shard_path(s['id'])
+    if not os.path.exists(path):
+        raise RuntimeError(f"No shard for {s['id']}; crawl it with --sets {s['id']}")
+    with open(path, 'r', encoding='utf-8') as f:
+        shard = json.load(f)
+    if shard['manifest']:
+        manifest[s['id']] = shard['manifest']
+    if shard['set'].get('last_card'):
+        s['last_card'] = shard['set']['last_card']
+    return shard['records']
+
+def iter_set_records(all_sets, manifest, existing, incremental, workers=1, only=None):
+    """
+    (set, records) in set order. Serially, each set is crawled as it is
+    reached. With workers > 1 or only (set ids), the chosen sets are crawled
+    into shards first and every set is then read back from its shard (or
+    the journal, when resuming), so the merge order never depends on which
+    process finished first.
+    """
+    finished = JOURNAL.sets if JOURNAL else {}
+    if workers <= 1 and not only:
+        for s in all_sets:
+            if s['id'] in finished:
+                yield s, resume_set(s, manifest)
+                continue
+            records = crawl_set(s, manifest, existing, incremental)
+            if JOURNAL:
+                JOURNAL.set_done(s, manifest.get(s['id']), records)
+            yield s, records
+        return
+
+    todo = [s for s in all_sets if (not only or s['id'] in only) and s['id'] not in finished]
+    crawl_sharded(todo, manifest, existing, incremental, max(1, workers))
+    for s in all_sets:
+        # A serial run being resumed never wrote shards for the sets its journal finished
+        yield s, resume_set(s, manifest) if s['id'] in finished else load_shard(s, manifest)
+
+def resume_set(s, manifest):
+    """
+    Records of a set the journal finished, with its manifest entry and
+    boundary: the records it stored, plus the rest rebuilt from the set's
+    enriched cards and parallel counts.
+    """
+    set_id = s['id']
+    entry = JOURNAL.sets[set_id]
+    stored = {}
+    for r in entry['records']:
+        stored.setdefault(r['card_no'], []).append(r)
+    enriched, counts = JOURNAL.cards.get(set_id, {}), JOURNAL.parallels.get(set_id, {})
+    rebuilt = {}
+    for r in build_card_records([c for no in entry['cards'] if no not in stored
+                                 for c in [enriched[no], *find_parallels(no, enriched[no], counts[no])]], set_id):
+        rebuilt.setdefault(r['card_no'], []).append(r)
+    records = [r for no in entry['cards'] for r in stored.get(no) or rebuilt[no]]
+
+    print(f"\n♻️ {set_id}: {len(records)} records from the journal")
+    if entry['manifest']:
+        manifest[set_id] = entry['manifest']
+    if entry['set'].get('last_card'):
+        s['last_card'] = entry['set']['last_card']
+    return records
+
+def main(incremental=False, output_format="json", compact=False, build_search=False, report_file=metrics.REPORT_FILE,
+         workers=1, only=None, resume=False, sqlite=False, feed=None, lookup=False):
+    global JOURNAL, TRUSTED
+    metrics.METRICS.reset()
+    JOURNAL = checkpoint.Journal(checkpoint.JOURNAL_FILE, resume)
     known_sets = load_known_sets()
     all_sets = hunt_for_new_sets(known_sets)
+    boundaries = load_boundaries()
+    for s in all_sets:
+        s.pop('last_card', None)
+        if boundaries.get(s['id']): s['last_card'] = boundaries[s['id']]
+    manifest = load_manifest()
+    cards_file = CARDS_FILE if output_format == "json" else CARDS_NDJSON_FILE
+    existing = load_existing_records(cards_file) if incremental or feed else {}
+    feed_records = reconcile.load_feed(feed) if feed else {}
+    TRUSTED = set()
+    if feed:
+        TRUSTED = reconcile.trusted_cards((r for group in existing.values() for rs in group.values() for r in rs), feed_records)
+        print(f"🤝 Feed {feed}: {len(feed_records)} cards, {len(TRUSTED)} agree with {cards_file}")
     
     decks_out = {}
-    cards_out = {}
 
-    for s in all_sets:
-        cards = process_set(s)
-        
-        if cards:
-            # Build Deck Objects
-            if s['id'].startswith("ST"):
-                base_cards = [c for c in cards if "_p" not in c.get('id', c['card_no'])]
-                decks_out[s['id']] = {
-                    "name": s['name'],
-                    "cards": [{"card_no": c['card_no'], "quantity": c['quantity']} for c in base_cards]
-                }
-            
-            # Build Card Objects
-            for c in cards:
-                uid = c.get('id', c['card_no'])
-                d = c.get('details', {})
+    # Card records are streamed out set by set; the file is swapped in on success
+    with card_stream.CardWriter(cards_file, output_format) as writer:
+        for s, records in iter_set_records(all_sets, manifest, existing, incremental, workers, only):
+            if records:
+                # Build Deck Objects
+                if s['id'].startswith("ST"):
+                    decks_out[s['id']] = build_deck(s, records)
                 
-                # --- HELPER: Returns Int or None (null) ---
-                def safe_int(key):
-                    val = d.get(key, '-')
-                    # If it's a placeholder or empty, return None (null)
-                    if not val or val == '-' or val == 'N/A':
-                        return None
-                    
-                    # Clean the string (remove non-digits)
-                    clean = re.sub(r'\D', '', str(val))
-                    return int(clean) if clean else None
-
-                # --- HELPER: Returns String or None (null) ---
-                def safe_str(key, default='-'):
-                    val = d.get(key, default)
-                    if not val or val == '-' or val == 'N/A':
-                        return None
-                    return val.strip()
-
-                # --- FINAL JSON MAPPING ---
-                cards_out[uid] = {
-                    "id": uid, 
-                    "card_no": c['card_no'], 
-                    "name": c['name'], 
-                    "image_url": c['image_url'],
-                    
-                    # Integers (will be null for Tokens/Events)
-                    "cost": safe_int('cost'),
-                    "hp": safe_int('hp'),
-                    "ap": safe_int('ap'),
-                    "level": safe_int('level'),
-                    
-                    # Strings (will be null if "-")
-                    "color": safe_str('color'),
-                    "type": c['type'],
-                    "rarity": c['rarity'],
-                    "trait": safe_str('trait'),
-                    "link": safe_str('link'),  # <--- NEW FIELD ADDED HERE
-                    "effect_text": safe_str('text', ''),
-                    
-                    # Extended Fields
-                    "zone": safe_str('zone'),
-                    "source": safe_str('source'),
-                    "product": safe_str('product_name'),
-                    "faq": d.get('faq', []), # Keep empty array if no FAQ
-                    
-                    "set": s['id']
-                }
+                # Write Card Objects
+                with metrics.stage("write_cards"):
+                    writer.write_all(records)
     
-    print(f"\n💾 Overwriting {CARDS_FILE} with fresh data...")
-    print(f"   - Saved {len(decks_out)} Decks")
-    with open(DECKS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(decks_out, f, indent=2)
+    with metrics.stage("output"):
+        # Remember set boundaries so the next brute-force crawl starts from them
+        if {s['id']: s['last_card'] for s in all_sets if s.get('last_card')} != boundaries:
+            save_boundaries(all_sets)
+
+        print(f"\n💾 Overwriting {cards_file} with fresh data...")
+        print(f"   - Saved {len(decks_out)} Decks")
+        with card_stream.atomic_write(DECKS_FILE) as f:
+            json.dump(decks_out, f, indent=2)
 
-    print(f"   - Saved {len(cards_out)} Cards")
-    with open(CARDS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(list(cards_out.values()), f, indent=2)
+        print(f"   - Saved {writer.count} Cards")
+
+        if compact:
+            print(f"   - Saved compact store to {CARDS_COMPACT_FILE}")
+            compact_store.write_compact(card_stream.iter_cards(cards_file), CARDS_COMPACT_FILE)
+
+        if lookup:
+            print(f"   - Saved card lookup to {LOOKUP_RECORDS_FILE} + {LOOKUP_INDEX_FILE}")
+            card_lookup.build(cards_file, LOOKUP_RECORDS_FILE, LOOKUP_INDEX_FILE)
+
+        if build_search:
+            print(f"   - Saved keyword index to {SEARCH_INDEX_FILE}")
+            search_index.build_index(cards_file, SEARCH_INDEX_FILE)
+
+        if sqlite:
+            print(f"   - Saved SQLite export to {SQLITE_FILE}")
+            export_db.export(SQLITE_FILE, cards_file, DECKS_FILE, export_db.default_og_file())
+
+        if feed:
+            report = reconcile.reconcile(card_stream.iter_cards(cards_file), feed_records)
+            reconcile.write_report(report, RECONCILE_FILE)
+            print(f"   - Saved reconciliation report to {RECONCILE_FILE} ({len(report['field_diffs'])} cards differ)")
+
+        save_manifest(manifest)
+
+        cache = http_cache.get_cache()
+        if cache:
+            cache.evict()
+
+    JOURNAL.close(finished=True)
+    JOURNAL = None
+    TRUSTED = set()
+
+    metrics.count("cards.written", writer.count)
+    if report_file:
+        metrics.METRICS.write_report(report_file)
+        print(f"   - Saved run report to {report_file}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Scrapes gundam-gcg.com into cards.json and decks.json.")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"only re-enrich cards that are new or changed since {MANIFEST_FILE} was written")
+    parser.add_argument("--format", choices=card_stream.FORMATS, default="json",
+                        help=f"json writes {CARDS_FILE}, ndjson streams one card per line to {CARDS_NDJSON_FILE}")
+    parser.add_argument("--compact", action="store_true",
+                        help=f"also write {CARDS_COMPACT_FILE}, with parallels stored as references to their base card")
+    parser.add_argument("--lookup", action="store_true",
+                        help=f"also write {LOOKUP_RECORDS_FILE} + {LOOKUP_INDEX_FILE}, for memory-mapped single-card lookups")
+    parser.add_argument("--search-index", action="store_true",
+                        help=f"also write {SEARCH_INDEX_FILE}, a keyword index over effect text and FAQ")
+    parser.add_argument("--sqlite", action="store_true",
+                        help=f"also write {SQLITE_FILE}, an indexed SQLite export (with og_main's feed when present)")
+    parser.add_argument("--feed", metavar="FILE",
+                        help="og_main output (data.json / og_data.json): carry forward cards it agrees with instead of "
+                             f"refetching their detail pages, and write {RECONCILE_FILE}")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"crawl sets on N processes, each writing a shard to {SHARD_DIR}/ before the merge")
+    parser.add_argument("--sets", type=lambda v: set(v.split(",")),
+                        help=f"only crawl these set ids (comma-separated); the others are merged from {SHARD_DIR}/")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"continue a failed run from {checkpoint.JOURNAL_FILE}, skipping cards and sets it already finished")
+    parser.add_argument("--report", default=metrics.REPORT_FILE,
+                        help="where to write per-stage timings and request statistics ('' to skip)")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="also run under cProfile and dump the stats to FILE (view with python -m pstats FILE)")
+    args = parser.parse_args()
+    run = lambda: main(incremental=args.incremental, output_format=args.format, compact=args.compact,
+                       build_search=args.search_index, report_file=args.report, workers=args.workers, only=args.sets,
+                       resume=args.resume, sqlite=args.sqlite, feed=args.feed,
+                       lookup=args.lookup)
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.runcall(run)
+        profiler.dump_stats(args.profile)
+    else:
+        run()
@@ -0,0 +1,145 @@
+"""
+Run instrumentation for the scraper.
+
+Stages are timed with a decorator or a `with` block, HTTP requests are
+counted by fetch.request, and main() writes everything to run_report.json:
+
+    @metrics.timed("detail")
+    def scrape_details(card_id): ...
+
+    with metrics.stage("output"):
+        ...
+
+Stage "seconds" is the summed duration of every call, so a stage that runs
+on worker threads (detail, get_soup) can exceed the run's wall time; p50/p95
+are per call. A request's latency includes any retries urllib3 made for it
+(those are also counted separately).
+"""
+import functools
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+REPORT_FILE = "run_report.json"
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list (None if empty)."""
+    if not values: return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+def summary(durations):
+    return {
+        "calls": len(durations),
+        "seconds": round(sum(durations), 4),
+        "p50_ms": round(percentile(durations, 50) * 1000, 2) if durations else None,
+        "p95_ms": round(percentile(durations, 95) * 1000, 2) if durations else None,
+    }
+
+class Metrics:
+    """Thread-safe stage timings, request statistics and named counters."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.clock = time.perf_counter()
+            self.stages = {}
+            self.counters = {}
+            self.latencies = []
+            self.statuses = {}
+            self.bytes = 0
+            self.errors = 0
+            self.retries = 0
+
+    def add_stage(self, name, seconds):
+        with self.lock:
+            self.stages.setdefault(name, []).append(seconds)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_request(self, seconds, response=None, retries=0):
+        """One HTTP request; response None means it raised."""
+        with self.lock:
+            self.latencies.append(seconds)
+            self.retries += retries
+            if response is None:
+                self.errors += 1
+                return
+            self.statuses[response.status_code] = self.statuses.get(response.status_code, 0) + 1
+            self.bytes += len(response.content)
+            if response.status_code >= 500:
+                self.errors += 1
+
+    def snapshot(self):
+        """Raw measurements, so a worker process can hand them back to be merged."""
+        with self.lock:
+            return {
+                "stages": {k: list(v) for k, v in self.stages.items()}, "counters": dict(self.counters),
+                "latencies": list(self.latencies), "statuses": dict(self.statuses),
+                "bytes": self.bytes, "errors": self.errors, "retries": self.retries,
+            }
+
+    def merge(self, snap):
+        with self.lock:
+            for k, v in snap["stages"].items():
+                self.stages.setdefault(k, []).extend(v)
+            for k, v in snap["counters"].items():
+                self.counters[k] = self.counters.get(k, 0) + v
+            for k, v in snap["statuses"].items():
+                self.statuses[k] = self.statuses.get(k, 0) + v
+            self.latencies.extend(snap["latencies"])
+            self.bytes += snap["bytes"]
+            self.errors += snap["errors"]
+            self.retries += snap["retries"]
+
+    def report(self):
+        with self.lock:
+            return {
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "wall_seconds": round(time.perf_counter() - self.clock, 4),
+                "stages": {name: summary(durations) for name, durations in self.stages.items()},
+                "requests": {
+                    "count": len(self.latencies),
+                    "bytes": self.bytes,
+                    "errors": self.errors,
+                    "retries": self.retries,
+                    "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+                    **{k: v for k, v in summary(self.latencies).items() if k != "calls"},
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def write_report(self, path=REPORT_FILE):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+METRICS = Metrics()
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.add_stage(name, time.perf_counter() - start)
+
+def timed(name):
+    """Decorator recording every call of the function as a stage."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def count(name, n=1):
+    METRICS.count(name, n)
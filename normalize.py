@@ -0,0 +1,100 @@
+"""
+Table-driven normalisation of scraped detail dicts into typed card fields.
+
+parse_details() returns raw strings keyed by its KEY_MAP outputs ("cost",
+"lv." -> "level", "where to get it" -> "product_name", ...). DETAIL_FIELDS
+declares, once, which cards.json field each of them becomes and how it is
+converted:
+
+    int   "-", "N/A" and "" become null, otherwise the digits ("Lv.3" -> 3)
+    str   "-", "N/A" and "" become null, otherwise the stripped text
+
+`normalise_batch` converts a whole list of detail dicts column by column,
+converting each distinct raw value only once (costs, colors, traits and
+zones repeat across thousands of cards). It has no scraping dependencies,
+so it also runs on its own over the parse results kept in the HTTP cache:
+
+    python normalize.py .http_cache.sqlite > details.ndjson
+"""
+import argparse
+import functools
+import json
+import re
+import sqlite3
+import sys
+
+PLACEHOLDERS = frozenset(["-", "N/A"])
+NON_DIGIT = re.compile(r'\D')
+RARITY_SEPARATORS = re.compile(r'[・/,\.\|\u30FB]')
+
+def to_int(val):
+    if not val or val in PLACEHOLDERS: return None
+    clean = NON_DIGIT.sub('', str(val))
+    return int(clean) if clean else None
+
+def to_str(val):
+    if not val or val in PLACEHOLDERS: return None
+    return val.strip()
+
+# (cards.json field, detail key, value when the key is missing, converter)
+DETAIL_FIELDS = (
+    ("cost", "cost", "-", to_int),
+    ("hp", "hp", "-", to_int),
+    ("ap", "ap", "-", to_int),
+    ("level", "level", "-", to_int),
+    ("color", "color", "-", to_str),
+    ("trait", "trait", "-", to_str),
+    ("link", "link", "-", to_str),
+    ("effect_text", "text", "", to_str),
+    ("zone", "zone", "-", to_str),
+    ("source", "source", "-", to_str),
+    ("product", "product_name", "-", to_str),
+)
+
+def normalise_batch(details_list):
+    """Typed DETAIL_FIELDS for every detail dict, in order."""
+    rows = [{} for _ in details_list]
+    for field, key, default, convert in DETAIL_FIELDS:
+        seen = {}
+        for row, d in zip(rows, details_list):
+            raw = d.get(key, default)
+            try:
+                row[field] = seen[raw]
+            except KeyError:
+                row[field] = seen[raw] = convert(raw)
+            except TypeError:  # unhashable raw value
+                row[field] = convert(raw)
+    return rows
+
+def normalise_details(d):
+    return {field: convert(d.get(key, default)) for field, key, default, convert in DETAIL_FIELDS}
+
+@functools.lru_cache(maxsize=None)
+def split_rarities(rarity_text):
+    """'R・R+' -> ('R', 'R+'); empty -> ('-',)."""
+    if not rarity_text: return ("-",)
+    return tuple(p.strip() for p in RARITY_SEPARATORS.split(rarity_text) if p.strip())
+
+@functools.lru_cache(maxsize=None)
+def rarity_tier(rarity):
+    """'r+' -> 'R' (parallel pluses dropped, upper-cased)."""
+    return rarity.replace('+', '').upper()
+
+def iter_cached_details(cache_path):
+    """(request key, detail dict) for every stored parse result in an http_cache file."""
+    db = sqlite3.connect(cache_path)
+    try:
+        for key, parsed in db.execute("SELECT key, parsed FROM responses WHERE parsed IS NOT NULL ORDER BY key"):
+            details = json.loads(parsed)
+            if isinstance(details, dict):
+                yield key, details
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalises the detail pages stored in the HTTP cache (NDJSON to stdout).")
+    parser.add_argument("cache", nargs="?", default=".http_cache.sqlite")
+    args = parser.parse_args()
+    cached = list(iter_cached_details(args.cache))
+    for (key, _), row in zip(cached, normalise_batch([d for _, d in cached])):
+        sys.stdout.write(json.dumps({"key": key, **row}, ensure_ascii=False) + "\n")
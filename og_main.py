@@ -4,12 +4,15 @@ import os
 import time
 import datetime
 import cloudinary
-import cloudinary.uploader
 import re
 
+import card_stream
+import image_sync
+
 # --- CONFIGURATION ---
 API_URL = "https://exburst.dev/gundam/external/fetch_data.php?gameid=gundam&series=*&seriesColumn=series"
 JSON_FILE = "data.json" 
+FEED_CHUNK = 64 * 1024
 
 # Cloudinary Setup
 cloudinary.config(
@@ -47,118 +50,112 @@ def parse_cookie_string(cookie_string):
             pass
     return cookies
 
-def upload_image_to_cloudinary(session, image_url, card_id):
-    temp_filename = f"temp_{card_id}.jpg"
-    try:
-        with session.get(image_url, stream=True) as r:
-            r.raise_for_status()
-            with open(temp_filename, 'wb') as f:
-                for chunk in r.iter_content(8192):
-                    f.write(chunk)
-        
-        print(f"Uploading image for {card_id}...")
-        # Note: We use the card_id as the public_id, which overwrites if it exists
-        upload_result = cloudinary.uploader.upload(
-            temp_filename,
-            public_id = f"gundam_cards/{card_id}", 
-            unique_filename = False, 
-            overwrite = True,
-            invalidate = True
-        )
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
-        return upload_result['secure_url']
-    except Exception as e:
-        print(f"Failed to upload image for {card_id}: {e}")
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
-        return None
+# Variant suffixes like -ALT1, _PAR, -P, -AP at the end of a cardNo
+VARIANT_SUFFIX = re.compile(r'(-ALT\d*|_PAR|-P|-AP)$', re.IGNORECASE)
+
+def split_card_no(raw_id):
+    """('GD01-021', True) for a variant like GD01-021-ALT1, (raw_id, False) for a base card."""
+    m = VARIANT_SUFFIX.search(raw_id)
+    if m:
+        return raw_id[:m.start()], True
+    return raw_id, False
+
+def iter_feed(session, url=API_URL):
+    """Yields the API's card objects one at a time while the response body is still arriving."""
+    with session.get(url, stream=True) as response:
+        response.raise_for_status()
+        if 'charset' not in response.headers.get('Content-Type', '').lower():
+            response.encoding = 'utf-8'  # JSON default; requests would assume ISO-8859-1 for text/*
+        yield from card_stream.iter_json_array(response.iter_content(FEED_CHUNK, decode_unicode=True))
+
+def merge_variants(records):
+    """
+    Groups API records by base card number in a single pass.
+    Returns {base_id: master record}, each with a 'variants' list of
+    {variantId, image (source URL), rarity}. A variant seen before its base
+    card creates a placeholder master, which the base card replaces when it
+    arrives (keeping the variants collected so far and the first-seen order).
+    Records are reused as master records rather than copied, so pass freshly
+    parsed ones; variant records are dropped once their fields are collected.
+    """
+    master_cards = {}
+
+    for card in records:
+        raw_id = card.get('cardNo')
+        if not raw_id: continue
+
+        base_id, is_variant = split_card_no(raw_id)
+        master = master_cards.get(base_id)
+
+        if not is_variant:
+            if master is None or master.get('is_placeholder'):
+                # This IS the standard card: initialise or promote over the placeholder
+                card['cardNo'] = base_id
+                card['variants'] = master['variants'] if master else []
+                master_cards[base_id] = card
+            continue
+
+        variant = {
+            "variantId": raw_id,
+            "image": card.get('image'),
+            "rarity": card.get('rarity')
+        }
+        if master is None:
+            # Variant BEFORE the standard card: placeholder built from the variant's data
+            master = card
+            master['cardNo'] = base_id
+            master['variants'] = []
+            master['is_placeholder'] = True
+            master_cards[base_id] = master
+
+        master['variants'].append(variant)
+
+    return master_cards
 
 def run_update():
     session = requests.Session()
     session.headers.update(HEADERS)
     session.cookies.update(parse_cookie_string(COOKIE_STRING))
+    images = image_sync.ImageSync(session)
 
     print(f"Querying API: {API_URL}")
+    received = 0
+
+    def counted(records):
+        nonlocal received
+        for card in records:
+            received += 1
+            yield card
+
+    # --- 1. VARIANT MERGING LOGIC ---
+    # The feed is parsed incrementally and merged as it arrives
     try:
-        response = session.get(API_URL)
-        response.raise_for_status()
-        api_data = response.json()
+        master_cards = merge_variants(counted(iter_feed(session)))
     except Exception as e:
         print(f"CRITICAL ERROR: Could not fetch API data. {e}")
         return
 
-    print(f"API returned {len(api_data)} cards.")
-
-    # --- 1. VARIANT MERGING LOGIC ---
-    # We use a dictionary to hold the "Master" copy of each card
-    # Key = Base ID (e.g., GD01-021), Value = Card Data Dict
-    master_cards = {}
+    print(f"API returned {received} cards.")
+    variant_count = sum(len(m['variants']) for m in master_cards.values())
+    print(f"Merged {variant_count} variants into {len(master_cards)} unique base cards.")
 
-    for card in api_data:
-        raw_id = card.get('cardNo')
-        if not raw_id: continue
+    # --- 2. UPLOAD IMAGES ---
+    # Variant images (unique variant ID) and base images (BASE ID) go out as one
+    # concurrent batch; unchanged images are skipped.
+    jobs = [(v['variantId'], v['image']) for m in master_cards.values() for v in m['variants']]
+    jobs += [(card_id, card_data.get('image')) for card_id, card_data in master_cards.items()]
+    cloud_urls = images.sync(jobs)
+    print(f"Images: {images.stats['uploaded']} uploaded, {images.stats['unchanged']} unchanged, "
+          f"{images.stats['failed']} failed")
 
-        # Identify if this is a variant (Alt Art, Parallel, etc.)
-        # Regex looks for suffixes like -ALT1, _PAR, -P, -AP at the end
-        is_variant = False
-        base_id = raw_id
-        
-        if re.search(r'(-ALT\d*|_PAR|-P|-AP)$', raw_id, re.IGNORECASE):
-            base_id = re.sub(r'(-ALT\d*|_PAR|-P|-AP)$', '', raw_id, flags=re.IGNORECASE)
-            is_variant = True
-
-        # Ensure we have a Master Record for this Base ID
-        if base_id not in master_cards:
-            if not is_variant:
-                # This IS the standard card. Initialize it.
-                card_copy = card.copy()
-                card_copy['cardNo'] = base_id
-                card_copy['variants'] = [] # List to hold alt arts
-                master_cards[base_id] = card_copy
-            else:
-                # We found a variant BEFORE the standard card.
-                # Create a placeholder master record using the variant's data for now.
-                # When the standard card arrives later in the loop, we will overwrite the main stats
-                # but keep the variants list.
-                card_copy = card.copy()
-                card_copy['cardNo'] = base_id
-                card_copy['variants'] = []
-                master_cards[base_id] = card_copy
-
-        # If we found the "Standard" card but only had a placeholder before, update the stats
-        if not is_variant and master_cards[base_id].get('is_placeholder', False):
-             # Logic to update stats could go here, but API usually sends standard first.
-             pass
-
-        # --- PROCESS VARIANT IMAGES ---
-        if is_variant:
-            print(f"Found Variant: {raw_id} (Base: {base_id})")
-            var_img_url = card.get('image')
-            
-            # Upload variant image to Cloudinary (using unique variant ID)
-            cloud_url = upload_image_to_cloudinary(session, var_img_url, raw_id)
-            
-            if cloud_url:
-                variant_data = {
-                    "variantId": raw_id,
-                    "image": cloud_url,
-                    "rarity": card.get('rarity')
-                }
-                # Append to the Master Record's variant list
-                master_cards[base_id]['variants'].append(variant_data)
-
-    # --- 2. FINALIZE & UPLOAD BASE IMAGES ---
-    print(f"Processing {len(master_cards)} unique base cards...")
-    
     final_list = []
-    
+
     for card_id, card_data in master_cards.items():
-        # Ensure Base Image is uploaded (if not already handled)
-        if 'cloudinary_url' not in card_data:
-             orig_img = card_data.get('image')
-             # Use the BASE ID for the main image
-             card_data['cloudinary_url'] = upload_image_to_cloudinary(session, orig_img, card_id)
+        card_data['cloudinary_url'] = cloud_urls.get(card_id)
+        # Variants whose image could not be uploaded are dropped
+        card_data['variants'] = [
+            {**v, "image": cloud_urls[v['variantId']]} for v in card_data['variants'] if cloud_urls.get(v['variantId'])
+        ]
 
         # --- 3. MAP TO APP SCHEMA ---
         # Construct the clean record exactly as the App expects it
@@ -0,0 +1,154 @@
+"""
+Reconciles main.py's scrape (cards.json, parallels as _pN ids) with og_main's
+exburst feed (data.json / og_data.json, alt arts as -ALTn variants).
+
+Both are keyed on the base card number and hash-joined, and compared on the
+fields the feed carries: name, cost, AP, color, type, rarity and effect text
+(FEED_FIELDS). HP, level, trait, link, zone, source, product and FAQ only
+exist on a card's detail page.
+
+    python reconcile.py                                 # cards.json vs data.json / og_data.json
+    python reconcile.py --cards cards.json --feed og_data.json --out reconcile_report.json
+
+The report lists the cards only one side has, the fields the two disagree
+on, parallel / variant count mismatches, and detail_fetches: the cards a
+`python main.py --feed FILE` run would still scrape.
+
+In such a run the feed is only a change detector: no feed value is written
+to cards.json, and cards only the feed has are ignored. A previously scraped
+card the feed agrees with - on every FEED_FIELDS field and on its number of
+parallels / variants - and whose list-view entry is unchanged keeps its old
+record as it is, instead of having its detail page fetched and its
+parallels probed again. Only cards the feed lacks, disagrees on, or that
+are new get fetched. The FAQ and the other detail-only fields of a trusted
+card are therefore not refreshed under --feed, even when the site changed
+them; a plain run refreshes everything.
+"""
+import argparse
+import json
+import re
+
+import card_stream
+import export_db
+import normalize
+
+FORMAT = "reconcile-v1"
+REPORT_FILE = "reconcile_report.json"
+LINE_BREAK = re.compile(r'<br\s*/?>', re.IGNORECASE)
+
+def feed_text(val):
+    """effectData HTML ('...<br>...<br>') -> effect_text."""
+    return normalize.to_str(LINE_BREAK.sub('\n', val).strip()) if val else None
+
+def feed_type(val):
+    return val.strip().upper() if val else None
+
+# (cards.json field, feed key, converter)
+FEED_FIELDS = (
+    ("name", "name", normalize.to_str),
+    ("cost", "cost", normalize.to_int),
+    ("ap", "apData", normalize.to_int),
+    ("color", "color", normalize.to_str),
+    ("type", "categoryData", feed_type),
+    ("rarity", "rarity", normalize.to_str),
+    ("effect_text", "effectData", feed_text),
+)
+DETAIL_ONLY_FIELDS = ("hp", "level", "trait", "link", "zone", "source", "product", "faq")
+
+def comparable(val):
+    """Strings compare with whitespace collapsed (the feed re-wraps effect text)."""
+    return " ".join(val.split()) if isinstance(val, str) else val
+
+def load_feed(path):
+    """{base card number: og_main record}."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return {c['cardNo']: c for c in json.load(f) if c.get('cardNo')}
+
+def feed_fields(feed_record):
+    return {field: convert(feed_record.get(key)) for field, key, convert in FEED_FIELDS}
+
+def field_diffs(record, feed_record):
+    """{field: {"scrape": value, "feed": value}} for every FEED_FIELDS field the two disagree on."""
+    return {
+        field: {"scrape": record.get(field), "feed": value}
+        for field, value in feed_fields(feed_record).items()
+        if comparable(record.get(field)) != comparable(value)
+    }
+
+def split_records(records):
+    """({card_no: base record}, {card_no: parallel count}) from cards.json records."""
+    base, parallels = {}, {}
+    for r in records:
+        if r['id'] == r['card_no']:
+            base.setdefault(r['card_no'], r)
+        else:
+            parallels[r['card_no']] = parallels.get(r['card_no'], 0) + 1
+    return base, parallels
+
+def feed_variants(feed_record):
+    return len(feed_record.get('variants') or [])
+
+def trusted_cards(records, feed):
+    """
+    Card numbers whose scraped record agrees with the feed on every
+    FEED_FIELDS field and whose parallel count matches its variant count.
+    """
+    base, parallels = split_records(records)
+    return {no for no, r in base.items() if no in feed and not field_diffs(r, feed[no])
+            and feed_variants(feed[no]) == parallels.get(no, 0)}
+
+def reconcile(records, feed):
+    """Joins cards.json records with the feed; returns the diff report."""
+    base, parallels = split_records(records)
+    only_scrape = [no for no in base if no not in feed]
+    only_feed = [no for no in feed if no not in base]
+    diffs, variant_diffs = {}, {}
+    for no, r in base.items():
+        feed_record = feed.get(no)
+        if feed_record is None: continue
+        found = field_diffs(r, feed_record)
+        if found:
+            diffs[no] = found
+        variants = feed_variants(feed_record)
+        if variants != parallels.get(no, 0):
+            variant_diffs[no] = {"parallels": parallels.get(no, 0), "feed_variants": variants}
+
+    diff_counts = {}
+    for found in diffs.values():
+        for field in found:
+            diff_counts[field] = diff_counts.get(field, 0) + 1
+    matched = len(base) - len(only_scrape)
+    disagreeing = set(diffs) | set(variant_diffs)
+    return {
+        "format": FORMAT,
+        "scrape_cards": len(base),
+        "feed_cards": len(feed),
+        "matched": matched,
+        "agreeing": matched - len(disagreeing),
+        "diff_counts": dict(sorted(diff_counts.items())),
+        "detail_fetches": sorted(disagreeing.union(only_scrape)),
+        "only_scrape": sorted(only_scrape),
+        "only_feed": sorted(only_feed),
+        "field_diffs": dict(sorted(diffs.items())),
+        "variant_diffs": dict(sorted(variant_diffs.items())),
+    }
+
+def write_report(report, path=REPORT_FILE):
+    with card_stream.atomic_write(path) as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diffs cards.json against og_main's exburst feed.")
+    parser.add_argument("--cards", default="cards.json")
+    parser.add_argument("--feed", default=export_db.default_og_file(), help="og_main output (default: data.json or og_data.json)")
+    parser.add_argument("--out", default=REPORT_FILE)
+    args = parser.parse_args()
+    if not args.feed:
+        raise SystemExit("No feed file found; run og_main.py or pass --feed")
+
+    report = reconcile(card_stream.iter_cards(args.cards), load_feed(args.feed))
+    write_report(report, args.out)
+    print(f"🤝 {report['matched']} cards in both ({report['agreeing']} agree), "
+          f"{len(report['only_scrape'])} only scraped, {len(report['only_feed'])} only in the feed")
+    print(f"   {len(report['detail_fetches'])} of {report['scrape_cards']} detail pages needed with --feed")
+    print(f"💾 Report saved to {args.out}")
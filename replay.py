@@ -0,0 +1,239 @@
+"""
+Record / replay of the scraper's HTTP traffic, for repeatable offline runs.
+
+`record` runs main() once against the live site (in a scratch directory, with
+the HTTP cache off) and captures every exchange that goes through fetch -
+list views, detail pages and parallel image probes - into one zip archive,
+together with the cards.json / decks.json that run produced and the
+set_config.json / set_boundaries.json it started from:
+
+    python replay.py record fixtures/live.zip
+    python replay.py check fixtures/live.zip --latency 0.05
+
+`replaying(archive)` mounts a transport on fetch's pooled session that answers
+from the archive (with ETag / 304 support and a configurable per-request
+latency), so main() runs unchanged and never touches the network. `check`
+replays the whole crawl and compares the outputs with the recorded ones;
+bench.py replay times it.
+"""
+import argparse
+import base64
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from http import HTTPStatus
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import fetch
+import http_cache
+import main
+
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Location")
+OUTPUTS = (main.CARDS_FILE, main.DECKS_FILE)
+
+def exchange_key(method, url):
+    """Method + URL with the query sorted, so param order doesn't matter."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {urlunsplit(parts._replace(query=query, fragment=''))}"
+
+class Recorder:
+    """
+    Collects exchanges from fetch.request (first response per method + URL
+    wins). Each redirect hop is filed under the URL it was requested at, so
+    replay follows the same redirects.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.exchanges = {}
+
+    def record(self, method, response):
+        for hop in [*response.history, response]:
+            # hop.url is the URL that hop was requested at; redirects may change the method (303)
+            key = exchange_key(hop.request.method if hop.request else method, hop.url)
+            entry = {
+                "status": hop.status_code,
+                "headers": {k: hop.headers[k] for k in KEPT_HEADERS if k in hop.headers},
+                "body": base64.b64encode(hop.content).decode("ascii"),
+            }
+            with self.lock:
+                self.exchanges.setdefault(key, entry)
+
+@contextmanager
+def recording():
+    recorder = Recorder()
+    fetch.RECORDER = recorder
+    try:
+        yield recorder
+    finally:
+        fetch.RECORDER = None
+
+class Archive:
+    """A recorded crawl: {key: exchange} plus the files the run read and wrote."""
+
+    def __init__(self, exchanges, files):
+        self.exchanges = exchanges
+        self.files = files
+
+    @classmethod
+    def load(cls, path):
+        with zipfile.ZipFile(path) as z:
+            exchanges = {}
+            for line in z.read("exchanges.jsonl").decode("utf-8").splitlines():
+                entry = json.loads(line)
+                exchanges[entry.pop("key")] = entry
+            files = {name: z.read(name) for name in z.namelist() if name != "exchanges.jsonl"}
+        return cls(exchanges, files)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("exchanges.jsonl", "".join(
+                json.dumps({"key": key, **entry}) + "\n" for key, entry in sorted(self.exchanges.items())
+            ))
+            for name, data in sorted(self.files.items()):
+                z.writestr(name, data)
+
+    def body(self, key):
+        return base64.b64decode(self.exchanges[key]["body"])
+
+    def detail_pages(self):
+        """{card_id: detail page bytes} for every recorded card page."""
+        prefix = exchange_key("GET", main.DETAIL_URL)
+        pages = {}
+        for key, entry in self.exchanges.items():
+            if key.startswith(prefix + "?") and entry["status"] == 200:
+                card_id = dict(parse_qsl(urlsplit(key.split(" ", 1)[1]).query)).get("detailSearch")
+                if card_id: pages[card_id] = self.body(key)
+        return pages
+
+class ReplayAdapter(BaseAdapter):
+    """requests transport serving an Archive; unrecorded URLs answer 404."""
+
+    def __init__(self, archive, latency=0.0):
+        super().__init__()
+        self.archive = archive
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.misses = []
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.latency:
+            time.sleep(self.latency)
+        key = exchange_key(request.method, request.url)
+        entry = self.archive.exchanges.get(key)
+        if entry is None:
+            with self.lock:
+                self.misses.append(key)
+            status, headers, body = 404, {}, b""
+        else:
+            status, headers, body = entry["status"], dict(entry["headers"]), self.archive.body(key)
+            etag = headers.get("ETag")
+            if status == 200 and etag and request.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+        if request.method == "HEAD":
+            body = b""
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = HTTPStatus(status).phrase
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response._content_consumed = True  # no raw stream: lets the session follow a recorded redirect
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+@contextmanager
+def replaying(archive, latency=0.0):
+    """Routes fetch's session through the archive for the duration of the block."""
+    adapter = ReplayAdapter(archive, latency)
+    fetch._session = None
+    session = fetch.session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    try:
+        yield adapter
+    finally:
+        fetch._session = None
+
+@contextmanager
+def scratch_dir(files=None):
+    """Runs the block inside a temp directory seeded with files, with the HTTP cache off."""
+    cwd, cache_file = os.getcwd(), http_cache.CACHE_FILE
+    tmp = tempfile.mkdtemp(prefix="replay-")
+    for name, data in (files or {}).items():
+        with open(os.path.join(tmp, name), "wb") as f:
+            f.write(data)
+    http_cache.CACHE_FILE = ""
+    os.chdir(tmp)
+    try:
+        yield tmp
+    finally:
+        os.chdir(cwd)
+        http_cache.CACHE_FILE = cache_file
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def read_files(names):
+    out = {}
+    for name in names:
+        if os.path.exists(name):
+            with open(name, "rb") as f:
+                out[name] = f.read()
+    return out
+
+def record(path):
+    """Crawls the live site once and saves the exchanges and outputs to path."""
+    seed = read_files([main.CONFIG_FILE, main.BOUNDARIES_FILE])
+    with scratch_dir(seed), recording() as recorder:
+        main.main(report_file="")
+        outputs = read_files(OUTPUTS)
+    archive = Archive(recorder.exchanges, {**outputs, **{f"input/{k}": v for k, v in seed.items()}})
+    archive.save(path)
+    print(f"📼 Recorded {len(recorder.exchanges)} exchanges to {path}")
+    return archive
+
+def run_main(archive, latency=0.0, **kwargs):
+    """Replays a full main() run; returns ({output name: bytes}, adapter)."""
+    seed = {k[len("input/"):]: v for k, v in archive.files.items() if k.startswith("input/")}
+    with scratch_dir(seed), replaying(archive, latency) as adapter:
+        main.main(report_file="", **kwargs)
+        return read_files(OUTPUTS), adapter
+
+def check(archive, latency=0.0):
+    """True when a replayed crawl reproduces the recorded outputs byte for byte."""
+    outputs, adapter = run_main(archive, latency)
+    same = True
+    for name in OUTPUTS:
+        ok = outputs.get(name) == archive.files.get(name)
+        same &= ok
+        print(f"   {name}: {'identical' if ok else 'DIFFERS'}")
+    if adapter.misses:
+        print(f"   ⚠️ {len(adapter.misses)} requests were not in the archive, e.g. {adapter.misses[0]}")
+    return same
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Records the live crawl into a fixture archive, or replays it.")
+    parser.add_argument("command", choices=["record", "check"])
+    parser.add_argument("archive")
+    parser.add_argument("--latency", type=float, default=0.0, help="replay latency per request (s)")
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.archive)
+    else:
+        raise SystemExit(0 if check(Archive.load(args.archive), args.latency) else 1)
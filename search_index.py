@@ -0,0 +1,197 @@
+"""
+Full-text inverted index over card effect_text and FAQ entries.
+
+Tokenisation understands the game's bracketed keywords: `<Repair 2>` is
+indexed as `<repair 2>`, `【During Pair】` as `【during pair】` and
+`[Amuro Ray]` as `[amuro ray]`, each taking a single position. Aliases share
+that position: the bare `<repair>`, the unqualified `【during pair】` of
+`【During Pair･Lv.3 or Lower Pilot】` and the inner words (`repair`,
+`during`, `pair`, ...), so a plain word search still finds keywords.
+Everything else is split into lowercase words (`AP+1` stays one token).
+Postings are positional, one document per base card number, so queries
+support:
+
+    blocker  /  <blocker>      a token
+    "during your turn"         a phrase (quoted)
+    <repair  /  rep*           a prefix (unclosed bracket or trailing *)
+    <blocker> "deploy"         several parts, all of which must match
+
+Effect text occupies positions [0, FIELD_GAP) and the i-th FAQ entry starts
+at (i + 1) * FIELD_GAP, so phrases never straddle fields and hits can be
+restricted to one field.
+
+    python search_index.py cards.json search_index.json
+"""
+import argparse
+import bisect
+import json
+import re
+
+import card_stream
+
+FORMAT = "search-v1"
+FIELD_GAP = 1000
+
+TOKEN = re.compile(r"""
+    (?P<angle><[^<>\n]*>)             # <Repair 2>, <Blocker>
+  | (?P<lenticular>【[^】\n]*】)       # 【During Pair】
+  | (?P<square>\[[^\[\]\n]*\])        # [Amuro Ray]
+  | (?P<word>[^\W_]+(?:['+\-][^\W_]+)*\+?)
+""", re.VERBOSE)
+WORD = re.compile(r"[^\W_]+(?:['+\-][^\W_]+)*\+?")
+KEYWORD_PARAM = re.compile(r'\s+[\d+\-]+$')
+KEYWORD_QUALIFIER = re.compile(r'[･・]')
+QUERY_PART = re.compile(r'"([^"]*)"|(<[^<>]*>|【[^】]*】|\[[^\[\]]*\]|\S+)')
+
+def normalise(text):
+    return " ".join(text.lower().split())
+
+def is_prefix(term):
+    return term.endswith("*") or (term[:1] in "<【[" and not term.endswith((">", "】", "]")))
+
+def tokenize(text):
+    """[(position, token)]; bracketed keywords add their aliases at the same position."""
+    out = []
+    for pos, m in enumerate(TOKEN.finditer(text or "")):
+        token = normalise(m.group())
+        out.append((pos, token))
+        if m.lastgroup == "word": continue
+        aliases = []
+        if m.lastgroup == "angle":
+            aliases.append(KEYWORD_PARAM.sub("", token[:-1]) + ">")
+        elif m.lastgroup == "lenticular":
+            aliases.append(KEYWORD_QUALIFIER.split(token[:-1])[0].rstrip() + "】")
+        aliases.extend(WORD.findall(token))
+        for alias in dict.fromkeys(aliases):
+            if alias != token:
+                out.append((pos, alias))
+    return out
+
+def document_tokens(card):
+    """Positional tokens of a card's effect text followed by its FAQ entries."""
+    tokens = tokenize(card.get('effect_text'))
+    for i, entry in enumerate(card.get('faq') or []):
+        offset = (i + 1) * FIELD_GAP
+        text = f"{entry.get('question', '')}\n{entry.get('answer', '')}"
+        tokens.extend((offset + pos, token) for pos, token in tokenize(text))
+    return tokens
+
+class SearchIndex:
+    """Term -> {doc: [positions]} postings over base card numbers."""
+
+    def __init__(self, docs, postings):
+        self.docs = docs
+        self.postings = postings
+        self.terms = sorted(postings)
+
+    @classmethod
+    def build(cls, cards):
+        docs = []
+        postings = {}
+        seen = set()
+        for card in cards:
+            if card['card_no'] in seen: continue  # parallels repeat the base card's text
+            seen.add(card['card_no'])
+            doc = len(docs)
+            docs.append(card['card_no'])
+            per_term = {}
+            for pos, token in document_tokens(card):
+                per_term.setdefault(token, []).append(pos)
+            for token, positions in per_term.items():
+                postings.setdefault(token, {})[doc] = positions
+        return cls(docs, postings)
+
+    # --- SERIALISATION ---
+
+    def to_json(self):
+        return {
+            "format": FORMAT, "docs": self.docs,
+            "terms": {t: [[doc, positions] for doc, positions in self.postings[t].items()] for t in self.terms},
+        }
+
+    def save(self, path):
+        with card_stream.atomic_write(path) as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path="search_index.json"):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("format") != FORMAT:
+            raise ValueError(f"Unsupported search index format {data.get('format')!r}")
+        return cls(data["docs"], {t: dict((doc, ps) for doc, ps in plist) for t, plist in data["terms"].items()})
+
+    # --- QUERIES ---
+
+    def prefix_terms(self, prefix):
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\uffff")
+        return self.terms[start:end]
+
+    def term_hits(self, term):
+        """{doc: positions} for a token, or for every token it prefixes (trailing '*' / open bracket)."""
+        if is_prefix(term):
+            hits = {}
+            for t in self.prefix_terms(term.rstrip("*")):
+                for doc, positions in self.postings[t].items():
+                    hits.setdefault(doc, []).extend(positions)
+            return hits
+        return self.postings.get(term, {})
+
+    def phrase_hits(self, phrase):
+        """{doc: start positions} where the phrase's tokens appear consecutively."""
+        # One token per position (drop the aliases of bracketed keywords)
+        tokens = []
+        for pos, token in tokenize(phrase):
+            if len(tokens) <= pos: tokens.append(token)
+        if not tokens: return {}
+
+        maps = [self.term_hits(token) for token in tokens]
+        if len(maps) == 1: return maps[0]
+        # Only documents containing every token need a positional check
+        docs = set(min(maps, key=len))
+        for m in maps:
+            docs &= m.keys()
+        shifted = list(enumerate(maps))[1:]
+        hits = {}
+        for doc in docs:
+            starts = set(maps[0][doc])
+            for offset, m in shifted:
+                starts &= {p - offset for p in m[doc]}
+                if not starts: break
+            if starts:
+                hits[doc] = starts
+        return hits
+
+    def search(self, query, field=None):
+        """Card numbers matching every part of the query (in cards.json order)."""
+        result = None
+        for m in QUERY_PART.finditer(query):
+            phrase, word = m.groups()
+            if phrase is not None:
+                hits = self.phrase_hits(phrase)
+            elif is_prefix(normalise(word)):
+                hits = self.term_hits(normalise(word))
+            else:
+                hits = self.phrase_hits(word)  # "AP+1" or "<Repair 2>" may still be one or more tokens
+            if field:
+                hits = {doc: ps for doc, ps in hits.items() if any(in_field(p, field) for p in ps)}
+            docs = set(hits)
+            result = docs if result is None else result & docs
+            if not result: break
+        return [self.docs[doc] for doc in sorted(result or ())]
+
+def in_field(position, field):
+    return (position < FIELD_GAP) == (field == "effect_text")
+
+def build_index(cards_path="cards.json", index_path="search_index.json"):
+    index = SearchIndex.build(card_stream.iter_cards(cards_path))
+    index.save(index_path)
+    return index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds the keyword search index next to cards.json.")
+    parser.add_argument("source", nargs="?", default="cards.json")
+    parser.add_argument("target", nargs="?", default="search_index.json")
+    args = parser.parse_args()
+    build_index(args.source, args.target)
@@ -0,0 +1,93 @@
+"""
+Crashed crawls resumed with --resume, against bench.py's stub copy of the
+site; a resumed run must write what a clean crawl writes.
+
+    python -m pytest -q test_checkpoint.py
+"""
+import json
+
+import pytest
+
+import checkpoint
+import fetch
+import http_cache
+import main
+import replay
+from bench import StubSite, make_stub_cards, point_main_at
+
+SET_IDS = ["ST01", "ST02", "ST03"]
+SETS = [{"id": set_id, "name": set_id, "type": "seq", "internal_id": ""} for set_id in SET_IDS]
+CONFIG = {main.CONFIG_FILE: json.dumps(SETS).encode()}
+
+@pytest.fixture(scope="module")
+def site():
+    cards = {}
+    for set_id in SET_IDS:
+        cards.update(make_stub_cards(set_id, 12))
+    fetch.RATE_LIMITER = fetch.HostRateLimiter(0)
+    http_cache.CACHE_FILE = ""
+    with StubSite(cards) as stub:
+        point_main_at(stub.base)
+        yield stub
+
+@pytest.fixture(scope="module")
+def clean(site):
+    """Outputs and manifest of a clean crawl, and the requests it took."""
+    with replay.scratch_dir(CONFIG):
+        before = site.requests
+        main.main(report_file="")
+        return replay.read_files(replay.OUTPUTS + (main.MANIFEST_FILE,)), site.requests - before
+
+def fail_on(monkeypatch, name, should_fail):
+    """Makes main.<name> raise when should_fail(*its args); returns a function that undoes it."""
+    original = getattr(main, name)
+
+    def failing(*args):
+        if should_fail(*args): raise RuntimeError("injected failure")
+        return original(*args)
+    monkeypatch.setattr(main, name, failing)
+    return lambda: monkeypatch.setattr(main, name, original)
+
+def journal():
+    """What --resume would load from the journal."""
+    loaded = checkpoint.Journal(resume=True)
+    loaded.close()
+    return loaded
+
+def crashes(**kwargs):
+    with pytest.raises(RuntimeError):
+        main.main(report_file="", **kwargs)
+
+def test_resume_after_incremental_resume_carried_a_set_forward(site, clean, monkeypatch):
+    clean, _ = clean
+    with replay.scratch_dir({**CONFIG, **clean}):
+        # 1. A full run fails partway through ST02, with some of its cards journaled
+        restore = fail_on(monkeypatch, "enrich_card", lambda c, set_id: c['card_no'] == "ST02-006")
+        crashes()
+        restore()
+        assert journal().cards.get("ST02")
+
+        # 2. --resume --incremental carries ST02 forward unchanged, then fails in ST03
+        restore = fail_on(monkeypatch, "list_set_cards", lambda s: s['id'] == "ST03")
+        crashes(resume=True, incremental=True)
+        restore()
+        assert "ST02" in journal().sets
+
+        # 3. ST02 is rebuilt from the journal
+        main.main(report_file="", resume=True)
+        assert replay.read_files(replay.OUTPUTS) == {name: clean[name] for name in replay.OUTPUTS}
+
+@pytest.mark.parametrize("failed_workers, resumed_workers", [(1, 1), (1, 2), (2, 1)])
+def test_resume_matches_clean_crawl(site, clean, monkeypatch, failed_workers, resumed_workers):
+    clean, clean_requests = clean
+    with replay.scratch_dir(CONFIG):
+        # Injected before the pool starts, so workers inherit it (fork start method)
+        restore = fail_on(monkeypatch, "enrich_cards", lambda cards, set_id: set_id == SET_IDS[-1])
+        crashes(workers=failed_workers)
+        restore()
+        assert sorted(journal().sets) == SET_IDS[:-1]
+
+        before = site.requests
+        main.main(report_file="", workers=resumed_workers, resume=True)
+        assert replay.read_files(replay.OUTPUTS) == {name: clean[name] for name in replay.OUTPUTS}
+        assert site.requests - before < clean_requests / 2
@@ -0,0 +1,58 @@
+"""
+main.find_last_card over simulated sets: where brute-forced sets end, with
+and without a boundary remembered in set_boundaries.json.
+
+    python -m pytest -q test_find_last_card.py
+"""
+import threading
+
+import pytest
+
+import main
+
+def prober(numbers):
+    """probe(i) for a set holding these card numbers; probe.calls counts the probes."""
+    lock = threading.Lock()
+
+    def probe(i):
+        with lock:
+            probe.calls += 1
+        return {"card_no": f"PR-{i:03d}"} if i in numbers else None
+    probe.calls = 0
+    return probe
+
+GAPS = {
+    "missing 030-031": set(range(1, 101)) - {30, 31},
+    "missing 030-040": set(range(1, 101)) - set(range(30, 41)),
+    "starts at 002": set(range(2, 61)),
+    "skips 023": set(range(1, 61)) - {23},
+    "lone card past a gap": {1, 2, 3, 50},
+    "lone card at the limit": {1, 120},
+    "empty": set(),
+}
+
+@pytest.mark.parametrize("numbers", GAPS.values(), ids=GAPS.keys())
+def test_new_set_probes_the_full_range(numbers):
+    probe = prober(numbers)
+    last, found = main.find_last_card(probe, 0, 120)
+    assert last == max(numbers, default=0)
+    assert {i for i, card in found.items() if card} == numbers
+    assert probe.calls == 120
+
+@pytest.mark.parametrize("numbers", [n for n in GAPS.values() if n], ids=[k for k, n in GAPS.items() if n])
+def test_remembered_boundary_is_kept(numbers):
+    probe = prober(numbers)
+    assert main.find_last_card(probe, max(numbers), 120)[0] == max(numbers)
+
+def test_unchanged_set_costs_a_few_probes():
+    probe = prober(set(range(1, 103)))
+    assert main.find_last_card(probe, 102, 120)[0] == 102
+    assert probe.calls <= 9
+
+def test_set_grown_past_its_remembered_boundary():
+    probe = prober(set(range(1, 103)) - {30, 31})
+    assert main.find_last_card(probe, 80, 120)[0] == 102
+
+def test_remembered_card_gone_falls_back_to_the_full_range():
+    probe = prober({1, 2, 3, 50})
+    assert main.find_last_card(probe, 60, 120)[0] == 50
@@ -0,0 +1,104 @@
+"""
+ImageSync against bench.py's local stand-ins for the image host and the
+upload endpoint (nothing here touches Cloudinary or the exburst host).
+
+    python -m pytest -q test_image_sync.py
+"""
+import hashlib
+import json
+import os
+
+import pytest
+import requests
+
+import image_sync
+from bench import StubImageCDN
+
+CARD_IDS = ["GD01-001", "GD01-002", "GD01-002-ALT1"]
+
+@pytest.fixture
+def cdn():
+    images = {card_id: os.urandom(4_000) for card_id in CARD_IDS}
+    with StubImageCDN(images) as host:
+        yield host
+
+def jobs(cdn, card_ids=CARD_IDS):
+    return [(card_id, f"{cdn.base}/img/{card_id}.webp") for card_id in card_ids]
+
+def secure_url(card_id):
+    return f"https://cdn.invalid/gundam_cards/{card_id}.webp"
+
+def new_sync(cdn, manifest_path):
+    return image_sync.ImageSync(requests.Session(), cdn.uploader(), str(manifest_path), workers=2)
+
+def read_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def test_cold_sync_uploads_and_records_manifest(cdn, tmp_path):
+    manifest_path = tmp_path / "image_manifest.json"
+    sync = new_sync(cdn, manifest_path)
+
+    assert sync.sync(jobs(cdn)) == {card_id: secure_url(card_id) for card_id in CARD_IDS}
+    assert sync.stats == {"uploaded": 3, "unchanged": 0, "failed": 0}
+    assert cdn.uploads == 3
+
+    manifest = read_manifest(manifest_path)
+    assert sorted(manifest) == sorted(CARD_IDS)
+    for card_id, url in jobs(cdn):
+        data = cdn.images[card_id]
+        assert manifest[card_id] == {
+            "hash": hashlib.sha256(data).hexdigest(),
+            "secure_url": secure_url(card_id),
+            "source_url": url,
+            "etag": f'"{hashlib.sha1(data).hexdigest()}"',
+            "last_modified": None,
+        }
+
+def test_not_modified_skips_download_and_upload(cdn, tmp_path):
+    manifest_path = tmp_path / "image_manifest.json"
+    new_sync(cdn, manifest_path).sync(jobs(cdn))
+    uploads, downloads = cdn.uploads, cdn.downloads
+
+    sync = new_sync(cdn, manifest_path)  # a later run, starting from the saved manifest
+    assert sync.sync(jobs(cdn)) == {card_id: secure_url(card_id) for card_id in CARD_IDS}
+    assert sync.stats == {"uploaded": 0, "unchanged": 3, "failed": 0}
+    assert (cdn.uploads, cdn.downloads) == (uploads, downloads)
+
+def test_unchanged_hash_skips_upload_without_validators(cdn, tmp_path):
+    manifest_path = tmp_path / "image_manifest.json"
+    new_sync(cdn, manifest_path).sync(jobs(cdn))
+    manifest = read_manifest(manifest_path)
+    for entry in manifest.values():
+        entry['etag'] = None
+    manifest_path.write_text(json.dumps(manifest), encoding='utf-8')
+    uploads, downloads = cdn.uploads, cdn.downloads
+
+    sync = new_sync(cdn, manifest_path)
+    assert sync.sync(jobs(cdn)) == {card_id: secure_url(card_id) for card_id in CARD_IDS}
+    assert sync.stats == {"uploaded": 0, "unchanged": 3, "failed": 0}
+    assert cdn.downloads == downloads + 3
+    assert cdn.uploads == uploads
+
+def test_changed_image_is_uploaded_again(cdn, tmp_path):
+    manifest_path = tmp_path / "image_manifest.json"
+    new_sync(cdn, manifest_path).sync(jobs(cdn))
+    changed = CARD_IDS[1]
+    cdn.images[changed] = os.urandom(4_000)
+    uploads = cdn.uploads
+
+    sync = new_sync(cdn, manifest_path)
+    assert sync.sync(jobs(cdn))[changed] == secure_url(changed)
+    assert sync.stats == {"uploaded": 1, "unchanged": 2, "failed": 0}
+    assert cdn.uploads == uploads + 1
+    assert read_manifest(manifest_path)[changed]['hash'] == hashlib.sha256(cdn.images[changed]).hexdigest()
+
+def test_failed_download_returns_none(cdn, tmp_path):
+    manifest_path = tmp_path / "image_manifest.json"
+    sync = new_sync(cdn, manifest_path)
+
+    results = sync.sync(jobs(cdn, ["GD01-001", "GD01-404"]) + [("GD01-003", None)])
+    assert results == {"GD01-001": secure_url("GD01-001"), "GD01-404": None, "GD01-003": None}
+    assert sync.stats == {"uploaded": 1, "unchanged": 0, "failed": 2}
+    assert cdn.uploads == 1
+    assert sorted(read_manifest(manifest_path)) == ["GD01-001"]
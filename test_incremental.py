@@ -0,0 +1,45 @@
+"""
+--incremental runs against bench.py's stub copy of the site: the delta must
+still converge on what a full crawl writes.
+
+    python -m pytest -q test_incremental.py
+"""
+import json
+
+import pytest
+
+import fetch
+import http_cache
+import main
+import replay
+from bench import StubSite, make_stub_cards, point_main_at
+
+SETS = [{"id": "ST01", "name": "ST01", "type": "seq", "internal_id": ""}]
+CONFIG = {main.CONFIG_FILE: json.dumps(SETS).encode()}
+
+@pytest.fixture(scope="module")
+def site():
+    fetch.RATE_LIMITER = fetch.HostRateLimiter(0)
+    http_cache.CACHE_FILE = ""
+    with StubSite(make_stub_cards("ST01", 12)) as stub:
+        point_main_at(stub.base)
+        yield stub
+
+@pytest.mark.parametrize("failure", [{}, {"rarity": "C", "rarity_list": ["C"], "text": "", "faq": [], "parallels": []}],
+                         ids=["fetch error", "error page"])
+def test_failed_detail_page_is_retried(site, monkeypatch, failure):
+    with replay.scratch_dir(CONFIG):
+        main.main(report_file="")
+        full = replay.read_files(replay.OUTPUTS)
+
+    with replay.scratch_dir(CONFIG):
+        scrape_details = main.scrape_details
+        monkeypatch.setattr(main, "scrape_details", lambda no: dict(failure) if no == "ST01-003" else scrape_details(no))
+        main.main(report_file="")
+        monkeypatch.setattr(main, "scrape_details", scrape_details)
+        assert "ST01-003" not in main.load_manifest()["ST01"]["cards"]
+        assert replay.read_files(replay.OUTPUTS) != full
+
+        main.main(report_file="", incremental=True)
+        assert replay.read_files(replay.OUTPUTS) == full
+        assert "ST01-003" in main.load_manifest()["ST01"]["cards"]
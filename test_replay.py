@@ -0,0 +1,65 @@
+"""
+Recording and replaying redirected requests against a local server.
+
+    python -m pytest -q test_replay.py
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetch
+import replay
+
+class RedirectingHandler(BaseHTTPRequestHandler):
+    """/old/* redirects (302) to /new/*, which answers with its path."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/old/"):
+            self.send_response(302)
+            self.send_header("Location", "/new/" + self.path[len("/old/"):])
+            body = b""
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            body = self.path.encode()
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+@pytest.fixture
+def base():
+    fetch.RATE_LIMITER = fetch.HostRateLimiter(0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RedirectingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fetch._session = None
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        fetch._session = None
+
+def test_redirect_hops_are_recorded_under_their_requested_urls(base):
+    with replay.recording() as recorder:
+        assert fetch.get(f"{base}/old/card?detailSearch=GD01-001").text == "/new/card?detailSearch=GD01-001"
+    hop = recorder.exchanges[replay.exchange_key("GET", f"{base}/old/card?detailSearch=GD01-001")]
+    assert (hop["status"], hop["headers"]["Location"]) == (302, "/new/card?detailSearch=GD01-001")
+    assert recorder.exchanges[replay.exchange_key("GET", f"{base}/new/card?detailSearch=GD01-001")]["status"] == 200
+
+def test_replay_follows_recorded_redirects(base):
+    with replay.recording() as recorder:
+        fetch.get(f"{base}/old/card")
+        fetch.head(f"{base}/old/image.webp")
+    archive = replay.Archive(recorder.exchanges, {})
+
+    with replay.replaying(archive) as adapter:
+        response = fetch.get(f"{base}/old/card")
+        assert (response.status_code, response.text) == (200, "/new/card")
+        assert fetch.head(f"{base}/old/image.webp").status_code == 302
+    assert adapter.misses == []
@@ -0,0 +1,40 @@
+"""
+Keyword searches over the checked-in cards.json, checked against a plain
+substring scan of the same text.
+
+    python -m pytest -q test_search_index.py
+"""
+import re
+
+import pytest
+
+import card_stream
+import search_index
+
+@pytest.fixture(scope="module")
+def cards():
+    base = {}
+    for card in card_stream.iter_cards("cards.json"):
+        base.setdefault(card['card_no'], card)
+    return base
+
+@pytest.fixture(scope="module")
+def index(cards):
+    return search_index.SearchIndex.build(cards.values())
+
+def card_text(card):
+    faq = "\n".join(f"{e.get('question', '')}\n{e.get('answer', '')}" for e in card.get('faq') or [])
+    return f"{card.get('effect_text') or ''}\n{faq}".lower()
+
+@pytest.mark.parametrize("keyword", ["【During Pair】", "【When Paired】", "【Activate】"])
+def test_lenticular_keyword_matches_qualified_forms(cards, index, keyword):
+    # 【During Pair】 and 【During Pair･Lv.3 or Lower Pilot】 alike
+    pattern = re.compile(re.escape(keyword[:-1].lower()) + r"\s*[】･・]")
+    expected = [no for no, card in cards.items() if pattern.search(card_text(card))]
+    assert expected
+    assert index.search(keyword) == expected
+
+def test_qualified_keyword_keeps_its_full_form():
+    assert search_index.tokenize("【During Pair･Lv.3 or Lower Pilot】")[:2] == [
+        (0, "【during pair･lv.3 or lower pilot】"), (0, "【during pair】"),
+    ]